@@ -0,0 +1,114 @@
+"""
+Доля попаданий и время чтения кэша: LocMemCache против SQLiteCache.
+
+Запускает --workers процессов, как воркеры gunicorn. Каждый делает
+--requests чтений ключей с распределением Ципфа (популярные страницы
+читают чаще) и при промахе кладёт значение размером --size байт,
+будто отрендерил фрагмент. У LocMemCache в каждом процессе своя
+копия, у SQLiteCache — общий файл:
+
+    python benchmarks/cache_backends.py --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from itertools import accumulate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'yatube'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--keys', type=int, default=5_000)
+    parser.add_argument('--size', type=int, default=4_096)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    return parser.parse_args()
+
+
+def make_cache(backend, location):
+    from django.core.cache.backends.locmem import LocMemCache
+
+    from core.cache_backends import SQLiteCache
+
+    params = {'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': 1_000_000}}
+    if backend == 'locmem':
+        return LocMemCache(location, params)
+    return SQLiteCache(location, params)
+
+
+def worker(backend, location, args, seed, results):
+    cache = make_cache(backend, location)
+    rnd = random.Random(seed)
+    weights = list(accumulate(
+        1 / rank ** args.zipf for rank in range(1, args.keys + 1)
+    ))
+    value = b'x' * args.size
+    hits, latencies = 0, []
+    for key in rnd.choices(
+        range(args.keys), cum_weights=weights, k=args.requests
+    ):
+        started = time.perf_counter()
+        found = cache.get(f'fragment:{key}')
+        elapsed = time.perf_counter() - started
+        if found is None:
+            cache.set(f'fragment:{key}', value)
+        else:
+            hits += 1
+            latencies.append(elapsed)
+    results.put((hits, latencies))
+
+
+def measure(backend, workers, args):
+    location = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=worker, args=(backend, location, args, seed, results)
+        )
+        for seed in range(workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    hits = sum(hit for hit, _ in collected)
+    latencies = sorted(
+        latency for _, chunk in collected for latency in chunk
+    )
+    total = workers * args.requests
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+    print(
+        f'{backend:>7} {workers:>7} {hits / total:>9.1%} '
+        f'{statistics.median(latencies) * 1e6:>10.1f} '
+        f'{p99 * 1e6:>10.1f} {total / elapsed:>10.0f}'
+    )
+
+
+def main():
+    args = parse_args()
+    from django.conf import settings
+
+    settings.configure()
+    print(
+        f'{"кэш":>7} {"воркеры":>7} {"попадания":>9} '
+        f'{"p50, мкс":>10} {"p99, мкс":>10} {"запр./с":>10}'
+    )
+    for workers in args.workers:
+        for backend in ('locmem', 'sqlite'):
+            measure(backend, workers, args)
+
+
+if __name__ == '__main__':
+    main()
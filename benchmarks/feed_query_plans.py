@@ -0,0 +1,179 @@
+"""
+Планы и время запросов лент до и после индексов из 0009_feed_indexes.
+
+Создаёт временную SQLite-базу, накатывает миграции до 0008_follow,
+заливает --posts постов (по умолчанию 1 000 000), печатает
+EXPLAIN QUERY PLAN и время запросов, затем докатывает миграции и
+повторяет замеры:
+
+    python benchmarks/feed_query_plans.py --posts 1000000
+
+Лента подписок и после индексов сортируется во временном B-дереве:
+посты N авторов сливаются в одну ленту, и ни один индекс по posts_post
+не отдаёт их уже упорядоченными. Это снимает таблица лент
+TimelineEntry (0011), а не индексы.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+BEFORE = '0008_follow'
+AFTER = '0009_feed_indexes'
+
+# Колонки, которые есть в схеме и до, и после AFTER: полная модель
+# текущего кода ссылается на поля более поздних миграций
+POST_COLUMNS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_COLUMNS = ('id', 'post_id', 'author_id', 'text', 'data_created')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--posts', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--groups', type=int, default=100)
+    parser.add_argument('--comments', type=int, default=1_000_000)
+    parser.add_argument('--follows', type=int, default=200)
+    # Подписки остальных пользователей: без них в posts_follow только
+    # строки первого, и планировщик предпочитает полный просмотр индексу
+    parser.add_argument('--other-follows', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    return parser.parse_args()
+
+
+def fill(connection, args):
+    from django.db import transaction
+
+    rnd = random.Random(0)
+    # SQLite-бэкенд Django хранит даты в UTC без смещения
+    start = datetime(2020, 1, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO auth_user (id, password, is_superuser, username, '
+            'first_name, last_name, email, is_staff, is_active, '
+            'date_joined) VALUES (?, "", 0, ?, "", "", "", 0, 1, ?)',
+            ((i, f'user{i}', start) for i in range(1, args.users + 1)),
+        )
+        cursor.executemany(
+            'INSERT INTO posts_group (id, title, slug, description) '
+            'VALUES (?, ?, ?, "")',
+            ((i, f'g{i}', f'g{i}') for i in range(1, args.groups + 1)),
+        )
+        cursor.executemany(
+            'INSERT INTO posts_post (id, text, pub_date, author_id, '
+            'group_id, image) VALUES (?, "текст", ?, ?, ?, "")',
+            (
+                (
+                    i,
+                    start + timedelta(seconds=i + rnd.randint(0, 60)),
+                    rnd.randint(1, args.users),
+                    rnd.randint(1, args.groups),
+                )
+                for i in range(1, args.posts + 1)
+            ),
+        )
+        cursor.executemany(
+            'INSERT INTO posts_comment (post_id, author_id, text, '
+            'data_created, data_updated) VALUES (?, ?, "к", ?, ?)',
+            (
+                (
+                    rnd.randint(1, args.posts),
+                    rnd.randint(1, args.users),
+                    start + timedelta(seconds=i),
+                    start + timedelta(seconds=i),
+                )
+                for i in range(args.comments)
+            ),
+        )
+        cursor.executemany(
+            'INSERT INTO posts_follow (user_id, author_id) VALUES (?, ?)',
+            (
+                (user, author)
+                for user in range(1, args.users + 1)
+                for author in rnd.sample(
+                    range(1, args.users + 1),
+                    args.follows if user == 1 else args.other_follows,
+                )
+                if author != user
+            ),
+        )
+
+
+def feed_queries():
+    from posts.models import Comment, Follow, Post
+    from posts.paginators import FEED_ORDERING
+
+    posts = Post.objects.values(*POST_COLUMNS)
+    return {
+        'index': posts.order_by(*FEED_ORDERING),
+        'profile': posts.filter(author_id=2).order_by(*FEED_ORDERING),
+        'group': posts.filter(group_id=1).order_by(*FEED_ORDERING),
+        # Как follow_index по ?page=: author_id IN (подписки)
+        'follow': posts.filter(author_id__in=Follow.objects.filter(
+            user_id=1
+        ).values('author_id')).order_by(*FEED_ORDERING),
+        'comments': Comment.objects.filter(post_id=1).values(
+            *COMMENT_COLUMNS
+        ),
+    }
+
+
+def measure(connection, label, per_page, repeat):
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f'\n=== {label} ===')
+    for name, queryset in feed_queries().items():
+        page = queryset[:per_page]
+        plan = page.explain()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(page)
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        print(f'\n[{name}] {elapsed:.2f} ms')
+        print(plan)
+
+
+def main():
+    args = parse_args()
+    import django
+    from django.conf import settings
+
+    handle, path = tempfile.mkstemp(suffix='.sqlite3')
+    os.close(handle)
+    settings.DATABASES['default']['NAME'] = path
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    try:
+        call_command('migrate', 'auth', verbosity=0)
+        call_command('migrate', 'posts', BEFORE, verbosity=0)
+        started = time.perf_counter()
+        fill(connection, args)
+        print(f'filled in {time.perf_counter() - started:.1f} s')
+        measure(
+            connection, f'before ({BEFORE})',
+            settings.NUM_OF_POSTS, args.repeat,
+        )
+        started = time.perf_counter()
+        call_command('migrate', 'posts', AFTER, verbosity=0)
+        print(f'\nindexes built in {time.perf_counter() - started:.1f} s')
+        measure(
+            connection, f'after ({AFTER})',
+            settings.NUM_OF_POSTS, args.repeat,
+        )
+    finally:
+        connection.close()
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='yatube-background',
+        )
+    return _executor
+
+
+def _run(func, args):
+    # У каждого потока своё соединение с БД: закрываем его за собой
+    close_old_connections()
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s упала', func.__name__)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(func, *args):
+    """
+    Выполняет func(*args) в пуле потоков после фиксации текущей
+    транзакции, не задерживая ответ. При BACKGROUND_TASKS_EAGER
+    (тесты, отладка) вызывает функцию сразу.
+    """
+    if settings.BACKGROUND_TASKS_EAGER:
+        func(*args)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args))
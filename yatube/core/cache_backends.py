@@ -0,0 +1,277 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import timing
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL,'
+    ' size INTEGER NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+# Отличает промах от сохранённого None
+_MISSING = object()
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в файле SQLite (режим WAL), общий для всех процессов хоста.
+
+    LOCATION — путь к файлу. Помимо стандартных MAX_ENTRIES и
+    CULL_FREQUENCY понимает OPTIONS:
+      MAX_SIZE — предел суммарного размера значений в байтах;
+      TOUCH_INTERVAL — как часто (в секундах) чтение обновляет время
+        доступа для LRU: запись на каждое чтение дорога;
+      CULL_EVERY — через сколько записей проверять пределы.
+    При превышении пределов удаляются просроченные, а затем давно
+    не читавшиеся записи.
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS') or {}
+        super().__init__(params)
+        self._path = location
+        self._max_size = options.get('MAX_SIZE')
+        self._touch_interval = options.get('TOUCH_INTERVAL', 10)
+        self._cull_every = options.get('CULL_EVERY', 100)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        # Своё соединение на поток и на процесс (после fork старое
+        # соединение родителя использовать нельзя)
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _expiry(self, timeout):
+        # Абсолютное время истечения или None для вечных значений
+        return self.get_backend_timeout(timeout)
+
+    def _store(self, db, key, value, timeout, replace=True):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        verb = 'INSERT OR REPLACE' if replace else 'INSERT OR IGNORE'
+        cursor = db.execute(
+            f'{verb} INTO cache (key, value, expires, accessed, size) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (key, data, self._expiry(timeout), time.time(), len(data)),
+        )
+        self._writes += 1
+        return cursor.rowcount > 0
+
+    def _after_write(self):
+        if self._writes >= self._cull_every:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        db = self._db
+        now = time.time()
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count, size = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache'
+        ).fetchone()
+        if count > self._max_entries:
+            # Как в стандартных бэкендах: убираем 1/CULL_FREQUENCY часть
+            excess = count - self._max_entries
+            drop = max(excess, count // self._cull_frequency)
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)', (drop,)
+            )
+        if self._max_size and size > self._max_size:
+            # Идём от самых старых записей, пока не уложимся в предел
+            target = size - self._max_size * 0.9
+            freed = 0
+            keys = []
+            for key, item_size in db.execute(
+                'SELECT key, size FROM cache ORDER BY accessed'
+            ):
+                keys.append((key,))
+                freed += item_size
+                if freed >= target:
+                    break
+            db.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def _load(self, rows, now):
+        # Разбирает строки (key, value, expires, accessed) выборки,
+        # отмечая доступ только у давно не читавшихся записей
+        found, touched = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed >= self._touch_interval:
+                touched.append((now, key))
+        if touched:
+            self._db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?', touched
+            )
+        return found
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()),
+            )
+            added = self._store(db, key, value, timeout, replace=False)
+        self._after_write()
+        return added
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        rows = self._db.execute(
+            'SELECT key, value, expires, accessed FROM cache WHERE key = ?',
+            (key,),
+        )
+        return self._load(rows, time.time()).get(key, default)
+
+    def get_many(self, keys, version=None):
+        mapping = {self.make_key(key, version=version): key for key in keys}
+        if not mapping:
+            return {}
+        for key in mapping:
+            self.validate_key(key)
+        placeholders = ', '.join('?' * len(mapping))
+        rows = self._db.execute(
+            'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            list(mapping),
+        )
+        found = self._load(rows, time.time())
+        return {mapping[key]: value for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._store(self._db, key, value, timeout)
+        self._after_write()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                self._store(db, key, value, timeout)
+        self._after_write()
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        # Чтение и запись в одной IMMEDIATE-транзакции: инкремент
+        # атомарен между процессами
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= time.time()):
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), key),
+            )
+        return value
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def delete_many(self, keys, version=None):
+        db = self._db
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            for key in keys:
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт весь поток: переоткрывать его на каждый
+        # запрос дороже, чем держать
+        pass
+
+
+class TimedCacheMixin:
+    """Сообщает попадания и промахи get/get_many в core.timing."""
+
+    def get(self, key, default=None, version=None):
+        started = time.perf_counter()
+        value = super().get(key, _MISSING, version=version)
+        hit = value is not _MISSING
+        timing.record_cache(hit, not hit, time.perf_counter() - started)
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        started = time.perf_counter()
+        found = super().get_many(keys, version=version)
+        timing.record_cache(
+            len(found), len(keys) - len(found),
+            time.perf_counter() - started,
+        )
+        return found
+
+
+class TimedSQLiteCache(TimedCacheMixin, SQLiteCache):
+    """SQLiteCache, попадания которого видны в Server-Timing."""
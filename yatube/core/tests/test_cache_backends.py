@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache_backends import SQLiteCache
+
+
+def _set_in_child(path):
+    SQLiteCache(path, {}).set('from_child', 'значение')
+
+
+def _incr_in_child(path, times):
+    cache = SQLiteCache(path, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        """Проверить get/set/add/delete/get_many/incr."""
+        self.cache.set('a', {'x': 1})
+        self.assertEqual(self.cache.get('a'), {'x': 1})
+        self.assertFalse(self.cache.add('a', 2))
+        self.assertTrue(self.cache.add('b', 2))
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': {'x': 1}, 'b': 2}
+        )
+        self.assertEqual(self.cache.incr('b', 3), 5)
+        with self.assertRaises(ValueError):
+            self.cache.incr('c')
+        self.cache.delete_many(['a', 'b'])
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_expired_values_are_missing(self):
+        """Проверить истечение срока жизни значений."""
+        self.cache.set('short', 1, timeout=0.01)
+        self.cache.set('forever', 1, timeout=None)
+        time.sleep(0.05)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.assertEqual(self.cache.get('forever'), 1)
+
+    def test_lru_eviction_by_entries_and_size(self):
+        """Проверить вытеснение давно не читавшихся записей."""
+        cache = self.make_cache(
+            MAX_ENTRIES=10, CULL_EVERY=1, TOUCH_INTERVAL=0
+        )
+        cache.set('hot', 'x')
+        for i in range(20):
+            cache.get('hot')
+            cache.set(f'cold{i}', 'x')
+        self.assertEqual(cache.get('hot'), 'x')
+        self.assertIsNone(cache.get('cold0'))
+
+        cache.clear()
+        cache = self.make_cache(MAX_SIZE=10_000, CULL_EVERY=1)
+        for i in range(20):
+            cache.set(f'big{i}', b'x' * 1000)
+        self.assertIsNone(cache.get('big0'))
+        self.assertIsNotNone(cache.get('big19'))
+
+    def test_shared_between_processes(self):
+        """Проверить, что значения и инкременты видны всем процессам."""
+        context = multiprocessing.get_context('fork')
+        child = context.Process(target=_set_in_child, args=(self.path,))
+        child.start()
+        child.join()
+        self.assertEqual(self.cache.get('from_child'), 'значение')
+
+        self.cache.set('counter', 0)
+        children = [
+            context.Process(target=_incr_in_child, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+        self.assertEqual(self.cache.get('counter'), 200)
@@ -0,0 +1,61 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+from posts.models import Post, User
+
+
+class ServerTimingTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='Пост', author=cls.author)
+        cls.PROFILE = reverse('posts:profile', kwargs={'username': 'author'})
+
+    def setUp(self):
+        cache.clear()
+
+    def get_logged(self, level='INFO'):
+        with self.assertLogs('core.timing', level) as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.PROFILE)
+        return response, json.loads(logs.records[-1].getMessage()), queries
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header_and_log_report_request(self):
+        """Проверить заголовок Server-Timing и строку лога запроса."""
+        response, record, queries = self.get_logged()
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'cache;dur=', 'template;dur=', 'total;dur='):
+            self.assertIn(metric, header)
+        self.assertIn(f'desc="{len(queries)} queries"', header)
+        self.assertEqual(record['view'], 'posts:profile')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(queries))
+        self.assertGreater(record['template_ms'], 0)
+        self.assertGreater(record['cache_misses'], 0)
+        self.assertNotIn('slowest_queries', record)
+        _, record, _ = self.get_logged()
+        self.assertGreater(record['cache_hits'], 0)
+
+    @override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_QUERIES=2)
+    def test_slow_request_logs_slowest_queries(self):
+        """Проверить предупреждение с самыми медленными SQL."""
+        _, record, _ = self.get_logged('WARNING')
+        slowest = record['slowest_queries']
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]['ms'], slowest[1]['ms'])
+        self.assertIn('SELECT', slowest[0]['sql'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        """Проверить, что заголовок отключается настройкой."""
+        self.assertFalse(self.client.get(self.PROFILE).has_header(
+            'Server-Timing'
+        ))
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+
+
+class TempStorageMixin:
+    """
+    Кэш и MEDIA_ROOT класса тестов во временном каталоге: cache.clear()
+    и загруженные картинки не трогают файлы разработчика в дереве.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_dir = tempfile.mkdtemp()
+        caches = {
+            'default': {
+                **settings.CACHES['default'],
+                'LOCATION': os.path.join(cls.temp_dir, 'cache.sqlite3'),
+            },
+        }
+        cls._temp_storage = override_settings(
+            CACHES=caches,
+            MEDIA_ROOT=os.path.join(cls.temp_dir, 'media'),
+        )
+        cls._temp_storage.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._remove_temp_storage()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._remove_temp_storage()
+
+    @classmethod
+    def _remove_temp_storage(cls):
+        cls._temp_storage.disable()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
@@ -0,0 +1,156 @@
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timing', default=None)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestTiming:
+    """Счётчики времени одного запроса: БД, кэш, шаблоны, всего."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db = 0.0
+        self.slowest = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache = 0.0
+        self.template = 0.0
+        self._rendering = 0
+
+    def execute(self, execute, sql, params, many, context):
+        # execute_wrapper соединения: видит каждый запрос и без DEBUG
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db += duration
+            # Храним только самые медленные запросы, а не все
+            entry = (duration, self.queries, sql)
+            if len(self.slowest) < settings.SLOW_REQUEST_QUERIES:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heappushpop(self.slowest, entry)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def header(self):
+        return ', '.join((
+            f'db;dur={_ms(self.db)};desc="{self.queries} queries"',
+            f'cache;dur={_ms(self.cache)};'
+            f'desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'template;dur={_ms(self.template)}',
+            f'total;dur={_ms(self.total)}',
+        ))
+
+    def record(self):
+        return {
+            'total_ms': _ms(self.total),
+            'db_ms': _ms(self.db),
+            'queries': self.queries,
+            'cache_ms': _ms(self.cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': _ms(self.template),
+        }
+
+    def slowest_queries(self):
+        return [
+            {'ms': _ms(duration), 'sql': sql}
+            for duration, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+def record_cache(hits, misses, duration):
+    """Вызывается кэш-бэкендом; вне запроса ничего не делает."""
+    timing = _current.get()
+    if timing is not None:
+        timing.cache_hits += hits
+        timing.cache_misses += misses
+        timing.cache += duration
+
+
+@contextmanager
+def rendering():
+    """
+    Отмечает отрисовку шаблона. Вложенные отрисовки (render_to_string
+    внутри тега) входят во внешнюю и отдельно не считаются.
+    """
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    timing._rendering += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing._rendering -= 1
+        if not timing._rendering:
+            timing.template += time.perf_counter() - started
+
+
+class ServerTimingMiddleware:
+    """
+    Меряет запрос: число и время запросов к БД, попадания и промахи
+    кэша, время отрисовки шаблонов и общее время. Отдаёт их в
+    заголовке Server-Timing и пишет JSON-строкой в лог core.timing:
+    каждый запрос — INFO, дольше SLOW_REQUEST_MS — WARNING вместе с
+    SLOW_REQUEST_QUERIES самыми медленными запросами SQL.
+    Должен стоять первым в MIDDLEWARE.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timing = RequestTiming()
+        token = _current.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        timing.finish()
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = timing.header()
+        self.log(request, response, timing)
+        return response
+
+    def log(self, request, response, timing):
+        slow = timing.total * 1000 >= settings.SLOW_REQUEST_MS
+        level = logging.WARNING if slow else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timing.record(),
+        }
+        if slow:
+            record['slowest_queries'] = timing.slowest_queries()
+        logger.log(level, json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,257 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import Comment, Follow, Group, Post, User
+from .paginators import (COMMENT_ORDERING, FEED_ORDERING, FOLLOW_ORDERING,
+                         CursorPaginator, InvalidCursor)
+
+# Поле ответа -> выражение для values(): связанные объекты отдаются
+# ключами, а не вложенными словарями, и берутся тем же JOIN
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'text': 'text',
+    'created': 'data_created',
+    'author': 'author__username',
+}
+
+
+def _user_fields(relation):
+    # Поля пользователя по другую сторону подписки
+    return {
+        'id': f'{relation}_id',
+        'username': f'{relation}__username',
+        'first_name': f'{relation}__first_name',
+        'last_name': f'{relation}__last_name',
+    }
+
+
+FOLLOWER_FIELDS = _user_fields('user')
+FOLLOWING_FIELDS = _user_fields('author')
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+# Преобразование значений после values()
+CONVERTERS = {'image': _image_url}
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _fields(request, available):
+    # ?fields=id,text,author — только эти поля, по умолчанию все
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise ApiError(
+            'Неизвестные поля: %s. Доступны: %s' % (
+                ', '.join(unknown), ', '.join(available)
+            )
+        )
+    return fields
+
+
+# Наибольший id, который SQLite принимает как INTEGER
+MAX_ID = 2 ** 63 - 1
+
+
+def _bounded_int(raw, minimum, maximum):
+    # int() вместо isdigit(): тот пропускает '²', на котором int падает
+    try:
+        value = int(raw)
+    except ValueError:
+        return None
+    return value if minimum <= value <= maximum else None
+
+
+def _limit(request, default):
+    raw = request.GET.get('limit')
+    if raw is None:
+        return default
+    limit = _bounded_int(raw, 1, settings.BATCH_SIZE)
+    if limit is None:
+        raise ApiError(f'limit — число от 1 до {settings.BATCH_SIZE}')
+    return limit
+
+
+def _rows(rows, fields, available):
+    # Словари values() переименовываются в поля ответа, лишние
+    # колонки (ключ курсора) отбрасываются
+    converters = [
+        (name, available[name], CONVERTERS.get(name)) for name in fields
+    ]
+    return [
+        {
+            name: convert(row[column]) if convert else row[column]
+            for name, column, convert in converters
+        }
+        for row in rows
+    ]
+
+
+def _columns(fields, available, ordering=()):
+    columns = [available[name] for name in fields]
+    columns += [
+        key.lstrip('-') for key in ordering
+        if key.lstrip('-') not in columns
+    ]
+    return columns
+
+
+def _page(request, queryset, available, ordering, per_page=None, **extra):
+    """Курсорная страница values()-выборки в виде ответа API."""
+    fields = _fields(request, available)
+    paginator = CursorPaginator(
+        queryset.values(*_columns(fields, available, ordering)).order_by(
+            *ordering
+        ),
+        _limit(request, per_page or settings.NUM_OF_POSTS),
+        ordering=ordering,
+    )
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except (InvalidCursor, ValidationError):
+        raise ApiError('Неверный cursor')
+    return _json({
+        'results': _rows(page.object_list, fields, available),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+        **extra,
+    })
+
+
+def _batch(request, raw_ids):
+    # ?ids=3,1,2 — посты в порядке запроса, отсутствующие пропускаются
+    parts = [part for part in raw_ids.split(',') if part.strip()]
+    if len(parts) > settings.BATCH_SIZE:
+        raise ApiError(f'Не больше {settings.BATCH_SIZE} ids за запрос')
+    ids = [_bounded_int(part, 0, MAX_ID) for part in parts]
+    if None in ids:
+        raise ApiError('ids — числа через запятую')
+    fields = _fields(request, POST_FIELDS)
+    rows = Post.objects.filter(id__in=ids).values(
+        *_columns(fields, POST_FIELDS, ('id',))
+    )
+    by_id = {row['id']: row for row in rows}
+    found = [by_id[pk] for pk in dict.fromkeys(ids) if pk in by_id]
+    return _json({'results': _rows(found, fields, POST_FIELDS)})
+
+
+def api_view(view):
+    """Только GET; ApiError превращается в JSON с кодом ошибки."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return _json({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def _id_of(model, **lookup):
+    pk = model.objects.filter(**lookup).values_list('id', flat=True).first()
+    if pk is None:
+        raise ApiError('Не найдено', status=404)
+    return pk
+
+
+@api_view
+def posts(request):
+    # Лента всех постов или пакет постов по ?ids=
+    if 'ids' in request.GET:
+        return _batch(request, request.GET['ids'])
+    return _page(request, Post.objects.all(), POST_FIELDS, FEED_ORDERING)
+
+
+@api_view
+def group_posts(request, slug):
+    group_id = _id_of(Group, slug=slug)
+    return _page(
+        request, Post.objects.filter(group_id=group_id),
+        POST_FIELDS, FEED_ORDERING,
+    )
+
+
+@api_view
+def profile_posts(request, username):
+    author_id = _id_of(User, username=username)
+    return _page(
+        request, Post.objects.filter(author_id=author_id),
+        POST_FIELDS, FEED_ORDERING,
+    )
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = _fields(request, POST_FIELDS)
+    row = Post.objects.filter(id=post_id).values(
+        *_columns(fields, POST_FIELDS)
+    ).first()
+    if row is None:
+        raise ApiError('Не найдено', status=404)
+    return _json(_rows([row], fields, POST_FIELDS)[0])
+
+
+@api_view
+def post_comments(request, post_id):
+    _id_of(Post, id=post_id)
+    return _page(
+        request, Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS, COMMENT_ORDERING,
+        per_page=settings.NUM_OF_COMMENTS,
+    )
+
+
+def _follow_page(request, username, relation, available):
+    user = User.objects.filter(username=username).values(
+        'id', f'counters__{relation}_count'
+    ).first()
+    if user is None:
+        raise ApiError('Не найдено', status=404)
+    lookup = 'author_id' if relation == 'followers' else 'user_id'
+    return _page(
+        request, Follow.objects.filter(**{lookup: user['id']}),
+        available, FOLLOW_ORDERING,
+        per_page=settings.NUM_OF_FOLLOWS,
+        count=user[f'counters__{relation}_count'] or 0,
+    )
+
+
+@api_view
+def followers(request, username):
+    return _follow_page(request, username, 'followers', FOLLOWER_FIELDS)
+
+
+@api_view
+def following(request, username):
+    return _follow_page(request, username, 'following', FOLLOWING_FIELDS)
@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _key(scope):
+    return f'cache_version:{scope}'
+
+
+def _modified_key(scope):
+    return f'cache_modified:{scope}'
+
+
+def _fresh_version():
+    # Потерянный ключ не должен вернуть старую версию: начинаем
+    # с метки времени, а не с единицы
+    return int(time.time() * 1000)
+
+
+def get_state(*scopes):
+    """
+    Версии областей одной строкой (для ключей кэша и ETag) и время
+    последнего изменения любой из них (для Last-Modified).
+    """
+    keys = [_key(scope) for scope in scopes]
+    modified_keys = [_modified_key(scope) for scope in scopes]
+    state = cache.get_many(keys + modified_keys)
+    for key, modified_key in zip(keys, modified_keys):
+        if key not in state:
+            cache.add(key, _fresh_version(), None)
+            state[key] = cache.get(key)
+        if modified_key not in state:
+            cache.add(modified_key, int(time.time()), None)
+            state[modified_key] = cache.get(modified_key)
+    version = '.'.join(str(state[key]) for key in keys)
+    return version, max(state[key] for key in modified_keys)
+
+
+def get_versions(*scopes):
+    """Текущие версии областей одной строкой, для ключа фрагмента."""
+    return get_state(*scopes)[0]
+
+
+def bump(*scopes):
+    """Делает устаревшими все фрагменты, зависящие от областей."""
+    now = int(time.time())
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.set(_key(scope), _fresh_version(), None)
+    cache.set_many(
+        {_modified_key(scope): now for scope in scopes}, None
+    )
+
+
+def bump_on_commit(*scopes):
+    """
+    bump сразу и ещё раз после коммита: запрос, отрисовавший страницу
+    между ними по незакоммиченному состоянию, положил бы её в кэш
+    под новой версией, и она устарела бы до следующей записи.
+    """
+    bump(*scopes)
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def post_scopes(post_id, author_id, *group_ids):
+    """Области главной, поста, профиля автора и групп поста."""
+    return (
+        'posts',
+        f'post:{post_id}',
+        f'author:{author_id}',
+        *(f'group:{group_id}' for group_id in set(group_ids) if group_id),
+    )
+
+
+def bump_post(post_id, author_id, *group_ids):
+    """Фрагменты главной, поста, профиля автора и групп поста."""
+    bump(*post_scopes(post_id, author_id, *group_ids))
+
+
+def fragment_cache(*scopes):
+    # Контекст для {% cache cache_timeout ... cache_version %}
+    return {
+        'cache_version': get_versions(*scopes),
+        'cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
@@ -0,0 +1,60 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from . import variants
+
+CARD_TEMPLATE = 'includes/cards/{}.html'
+
+
+def _digest(post):
+    # Всё, что выводит карточка: правка поста, смена имени автора или
+    # названия группы дают новый ключ, и старая карточка не читается
+    author, group = post.author, post.group
+    parts = (
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name,
+        post.image_widths,
+        author.username,
+        author.first_name,
+        author.last_name,
+        group.slug if group else '',
+        group.title if group else '',
+    )
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def card_key(variant, post):
+    return f'post_card:{variant}:{post.id}:{_digest(post)}'
+
+
+def _cacheable(post):
+    # Заглушка вместо картинки не кэшируется: её сменят варианты,
+    # которые готовятся фоном, а ключ карточки останется прежним
+    return not post.image or bool(variants.parse_widths(post.image_widths))
+
+
+def render_cards(posts, variant, thumbnails=None):
+    """
+    HTML карточек постов в порядке posts: готовые берутся одним
+    cache.get_many, отрисовываются и кладутся одним set_many только
+    промахи. Ключ содержит хэш содержимого карточки, поэтому явного
+    сброса не нужно. Карточки не зависят от пользователя.
+    """
+    keys = [card_key(variant, post) for post in posts]
+    cached = cache.get_many(keys)
+    template = get_template(CARD_TEMPLATE.format(variant))
+    cards, missing = [], {}
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = template.render({'post': post, 'thumbnails': thumbnails})
+            if _cacheable(post):
+                missing[key] = html
+        cards.append(html)
+    if missing:
+        cache.set_many(missing, settings.FRAGMENT_CACHE_TIMEOUT)
+    return cards
@@ -0,0 +1,49 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_of(queryset, field):
+    # Подзапрос «число строк с field = pk внешней строки»
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount(apps=global_apps):
+    """
+    Пересчитывает все денормализованные счётчики набором UPDATE ...
+    SET = (SELECT COUNT ...) без загрузки строк в память.
+    Принимает реестр моделей, чтобы работать и из миграций.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    Follow = apps.get_model('posts', 'Follow')
+    UserCounter = apps.get_model('posts', 'UserCounter')
+
+    with transaction.atomic():
+        missing = User.objects.filter(counters__isnull=True)
+        UserCounter.objects.bulk_create(
+            (UserCounter(user_id=pk)
+             for pk in missing.values_list('pk', flat=True).iterator()),
+            batch_size=settings.BATCH_SIZE,
+        )
+        Post.objects.update(
+            comments_count=_count_of(Comment.objects.all(), 'post')
+        )
+        UserCounter.objects.update(
+            posts_count=_count_of(Post.objects.all(), 'author'),
+            followers_count=_count_of(Follow.objects.all(), 'author'),
+            following_count=_count_of(Follow.objects.all(), 'user'),
+        )
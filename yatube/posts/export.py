@@ -0,0 +1,58 @@
+import json
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+POST_FIELDS = (
+    'id', 'author__username', 'group__slug', 'text', 'pub_date', 'image',
+)
+COMMENT_FIELDS = ('post_id', 'author__username', 'text', 'data_created')
+
+
+def _dumps(record):
+    return json.dumps(record, ensure_ascii=False, cls=DjangoJSONEncoder)
+
+
+def _comments_by_post(post_ids):
+    comments = Comment.objects.filter(post_id__in=post_ids).order_by(
+        'post_id', 'data_created', 'id'
+    ).values_list(*COMMENT_FIELDS)
+    rows = comments.iterator(chunk_size=settings.BATCH_SIZE)
+    for post_id, group in groupby(rows, key=itemgetter(0)):
+        yield post_id, [
+            {'author': author, 'text': text, 'created': created}
+            for _, author, text, created in group
+        ]
+
+
+def export_posts(**filters):
+    """
+    Строки NDJSON: пост с комментариями на строку. Посты читаются
+    keyset-пачками по id размером BATCH_SIZE, комментарии — одним
+    запросом на пачку, поэтому память не зависит от числа постов.
+    Поля поста совпадают с форматом import_archive.
+    """
+    posts = Post.objects.filter(**filters).order_by('id').values_list(
+        *POST_FIELDS
+    )
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:settings.BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1][0]
+        comments = dict(_comments_by_post([row[0] for row in batch]))
+        for post_id, author, group, text, pub_date, image in batch:
+            yield _dumps({
+                'id': post_id,
+                'author': author,
+                'group': group,
+                'text': text,
+                'pub_date': pub_date,
+                'image': image or None,
+                'comments': comments.get(post_id, []),
+            }) + '\n'
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def following_ids(user_id):
+    """
+    Множество id авторов, на которых подписан пользователь. Читается
+    из кэша, при промахе — одним запросом по индексу подписок.
+    """
+    ids = cache.get(_key(user_id))
+    if ids is None:
+        ids = frozenset(
+            Follow.objects.filter(user_id=user_id).values_list(
+                'author_id', flat=True
+            )
+        )
+        # add, а не set: не затираем то, что успел положить соседний
+        # запрос после сброса
+        cache.add(_key(user_id), ids, settings.FOLLOWING_CACHE_TIMEOUT)
+    return ids
+
+
+def is_following(user_id, author_id):
+    return author_id in following_ids(user_id)
+
+
+def forget(*user_ids):
+    """Сбрасывает множества; следующее чтение соберёт их заново."""
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+def forget_on_commit(user_id):
+    # Сразу и ещё раз после коммита: в промежутке соседний запрос
+    # мог собрать множество из незакоммиченного состояния
+    forget(user_id)
+    transaction.on_commit(lambda: forget(user_id))
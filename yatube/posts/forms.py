@@ -1,12 +1,24 @@
 from django import forms
 
-from .models import Comment, Post
+from .models import Comment, Group, Post
+from .uploads import check_image, shrink_image
+
+
+class PostImageField(forms.ImageField):
+    """Картинка поста с ограничениями и уменьшением из posts.uploads."""
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        check_image(data)
+        return shrink_image(super().to_python(data))
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ['text', 'group', 'image']
+        field_classes = {'image': PostImageField}
         help_texts = {
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относится пост',
@@ -21,3 +33,15 @@ class CommentForm(forms.ModelForm):
         help_text = {
             'text': 'Текст поста'
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Найти', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        label='Группа',
+        required=False,
+        to_field_name='slug',
+        empty_label='Все группы',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
@@ -0,0 +1,353 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache_versions, follow_graph, search, timeline
+from .counters import recount
+from .models import Comment, Follow, Group, Post, User
+from .paginators import count_key
+
+# Порядок важен: каждая сущность ссылается только на предыдущие
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+
+# Сколько пачек BATCH_SIZE входит в одну транзакцию
+BATCHES_PER_TRANSACTION = 50
+
+
+def find_file(directory, kind):
+    """users.jsonl или users.csv в каталоге архива, иначе None."""
+    for extension in ('jsonl', 'csv'):
+        path = os.path.join(directory, f'{kind}.{extension}')
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_records(path):
+    # Построчное чтение: файл любого размера не загружается целиком
+    with open(path, encoding='utf-8', newline='') as source:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _checkpoint_path(path):
+    return path + '.done'
+
+
+def read_checkpoint(path):
+    try:
+        with open(_checkpoint_path(path)) as checkpoint:
+            return int(checkpoint.read() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, done):
+    # Запись через переименование: файл не останется полузаписанным
+    temporary = _checkpoint_path(path) + '.tmp'
+    with open(temporary, 'w') as checkpoint:
+        checkpoint.write(str(done))
+    os.replace(temporary, _checkpoint_path(path))
+
+
+def parse_date(value):
+    if value:
+        try:
+            # Быстрый разбор ISO 8601 на C, regex Django — запасной
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = parse_datetime(value)
+    if value is None:
+        value = timezone.now()
+    elif settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, timezone.utc)
+    return connection.ops.adapt_datetimefield_value(value)
+
+
+class _Table:
+    """
+    Готовый INSERT ... (игнорируя конфликты) для executemany: поля
+    из записи идут первыми, остальные колонки получают умолчания
+    модели, вычисленные один раз. Экземпляры моделей не создаются —
+    на миллионах строк именно они съедают время bulk_create.
+    """
+
+    def __init__(self, model, fields):
+        meta = model._meta
+        rest = [
+            field for field in meta.concrete_fields
+            if field.attname not in fields
+            and not (field.primary_key and field.get_internal_type() in (
+                'AutoField', 'BigAutoField'
+            ))
+        ]
+        columns = [meta.get_field(name).column for name in fields]
+        columns += [field.column for field in rest]
+        self.defaults = tuple(
+            field.get_db_prep_save(field.get_default(), connection)
+            for field in rest
+        )
+        ops = connection.ops
+        self.sql = '%s %s (%s) VALUES (%s)%s' % (
+            ops.insert_statement(ignore_conflicts=True),
+            ops.quote_name(meta.db_table),
+            ', '.join(ops.quote_name(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+            ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+        )
+
+    def insert(self, cursor, rows):
+        cursor.executemany(self.sql, [row + self.defaults for row in rows])
+
+
+class Importer:
+    """
+    Потоковый импорт архива: записи читаются по одной, внешние ключи
+    разрешаются через словари в памяти (username -> id, slug -> id),
+    строки вставляются executemany пачками BATCH_SIZE в транзакциях
+    по BATCHES_PER_TRANSACTION пачек. После каждой транзакции число
+    обработанных записей пишется в <файл>.done, и повторный запуск с
+    resume продолжает с этого места. Уже вставленные пользователи,
+    группы, посты и подписки пропускаются.
+
+    Записи архива:
+      users    — username, first_name, last_name, email;
+      groups   — slug, title, description;
+      posts    — id, author (username), group (slug), text, pub_date,
+                 image (имя файла в хранилище);
+      comments — post (id поста), author, text, created;
+      follows  — user, author (username).
+    """
+
+    # Поля, которые заполняет build_<вид>, в порядке кортежа
+    FIELDS = {
+        'users': (User, ('username', 'first_name', 'last_name', 'email',
+                         'password')),
+        'groups': (Group, ('slug', 'title', 'description')),
+        'posts': (Post, ('id', 'author_id', 'group_id', 'text',
+                         'pub_date', 'image')),
+        'comments': (Comment, ('post_id', 'author_id', 'text',
+                               'data_created', 'data_updated')),
+        'follows': (Follow, ('user_id', 'author_id')),
+    }
+
+    def __init__(self, log=None):
+        self.log = log or (lambda message: None)
+        self.batch_size = settings.BATCH_SIZE
+        self._user_ids = None
+        self._group_ids = None
+        self._post_ids = None
+        # id авторов, групп и подписчиков — не больше числа
+        # пользователей; нужны только для сброса кэшей
+        self.authors = set()
+        self.groups = set()
+        self.followers = set()
+
+    @property
+    def user_ids(self):
+        if self._user_ids is None:
+            self._user_ids = dict(
+                User.objects.values_list('username', 'id').iterator()
+            )
+        return self._user_ids
+
+    @property
+    def group_ids(self):
+        if self._group_ids is None:
+            self._group_ids = dict(
+                Group.objects.values_list('slug', 'id').iterator()
+            )
+        return self._group_ids
+
+    @property
+    def post_ids(self):
+        if self._post_ids is None:
+            self._post_ids = set(
+                Post.objects.values_list('id', flat=True).iterator()
+            )
+        return self._post_ids
+
+    def build_users(self, record):
+        return (
+            record['username'],
+            record.get('first_name') or '',
+            record.get('last_name') or '',
+            record.get('email') or '',
+            make_password(None),
+        )
+
+    def after_users(self, rows):
+        # id вставленных строк executemany не возвращает: дочитываем
+        self.user_ids.update(User.objects.filter(
+            username__in=[row[0] for row in rows]
+        ).values_list('username', 'id'))
+
+    def build_groups(self, record):
+        return (
+            record['slug'],
+            record.get('title') or record['slug'],
+            record.get('description') or '',
+        )
+
+    def after_groups(self, rows):
+        self.group_ids.update(Group.objects.filter(
+            slug__in=[row[0] for row in rows]
+        ).values_list('slug', 'id'))
+
+    def build_posts(self, record):
+        author_id = self.user_ids.get(record['author'])
+        group_id = None
+        if record.get('group'):
+            group_id = self.group_ids.get(record['group'])
+            if group_id is None:
+                return None
+        if author_id is None:
+            return None
+        return (
+            int(record['id']),
+            author_id,
+            group_id,
+            record['text'],
+            parse_date(record.get('pub_date')),
+            record.get('image') or '',
+        )
+
+    def after_posts(self, rows):
+        for post_id, author_id, group_id, *_ in rows:
+            self.post_ids.add(post_id)
+            self.authors.add(author_id)
+            if group_id:
+                self.groups.add(group_id)
+
+    def build_comments(self, record):
+        post_id = int(record['post'])
+        author_id = self.user_ids.get(record['author'])
+        if author_id is None or post_id not in self.post_ids:
+            return None
+        created = parse_date(record.get('created'))
+        return post_id, author_id, record['text'], created, created
+
+    def build_follows(self, record):
+        user_id = self.user_ids.get(record['user'])
+        author_id = self.user_ids.get(record['author'])
+        if user_id is None or author_id is None or user_id == author_id:
+            return None
+        return user_id, author_id
+
+    def after_follows(self, rows):
+        self.followers.update(user_id for user_id, _ in rows)
+
+    def _flush(self, kind, table, rows):
+        after = getattr(self, f'after_{kind}', None)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                table.insert(cursor, batch)
+                if after is not None:
+                    after(batch)
+
+    def import_file(self, kind, path, resume=False):
+        """Импортирует один файл; возвращает (вставлено, пропущено)."""
+        done = read_checkpoint(path) if resume else 0
+        return self.import_records(
+            kind,
+            islice(read_records(path), done, None),
+            done=done,
+            checkpoint=lambda done: write_checkpoint(path, done),
+        )
+
+    def import_records(self, kind, records, done=0, checkpoint=None):
+        """
+        Импортирует поток записей одного вида; checkpoint получает
+        число обработанных записей после каждой транзакции.
+        """
+        build = getattr(self, f'build_{kind}')
+        table = _Table(*self.FIELDS[kind])
+        chunk_size = self.batch_size * BATCHES_PER_TRANSACTION
+        started = time.monotonic()
+        imported = skipped = 0
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            rows = [build(record) for record in chunk]
+            ready = [row for row in rows if row is not None]
+            if ready:
+                self._flush(kind, table, ready)
+            imported += len(ready)
+            skipped += len(rows) - len(ready)
+            done += len(chunk)
+            if checkpoint is not None:
+                checkpoint(done)
+            elapsed = time.monotonic() - started
+            self.log(
+                f'{kind}: {done} записей, '
+                f'{int((imported + skipped) / max(elapsed, 1e-6))} в секунду'
+            )
+        return imported, skipped
+
+    @contextmanager
+    def bulk(self):
+        """
+        Обрамляет массовую вставку. Триггеры индекса поиска обновляют
+        FTS5 построчно, это на порядок медленнее самой вставки: на
+        время загрузки снимаем их, а search.install ставит обратно и
+        строит индекс заново. После успешной загрузки пересчитываются
+        производные данные.
+        """
+        search.drop_triggers(connection)
+        try:
+            yield self
+        finally:
+            search.install(connection)
+        self.refresh_derived()
+
+    def run(self, directory, kinds=KINDS, resume=False):
+        with self.bulk():
+            for kind in kinds:
+                path = find_file(directory, kind)
+                if path is None:
+                    continue
+                imported, skipped = self.import_file(kind, path, resume)
+                self.log(
+                    f'{kind}: вставлено {imported}, пропущено {skipped}'
+                )
+
+    def refresh_derived(self):
+        """
+        Вставка идёт мимо сигналов: пересчитываем счётчики, ленты
+        подписок и сбрасываем кэши затронутых страниц.
+        """
+        recount()
+        self.refresh_timelines()
+        follow_graph.forget(*self.followers)
+        cache.delete_many([
+            count_key('all'),
+            *(count_key('author', author_id) for author_id in self.authors),
+            *(count_key('group', group_id) for group_id in self.groups),
+        ])
+        cache_versions.bump(
+            'posts', 'groups', 'users',
+            *(f'author:{author_id}' for author_id in self.authors),
+            *(f'group:{group_id}' for group_id in self.groups),
+        )
+
+    def refresh_timelines(self):
+        # Одним INSERT ... SELECT по всем подпискам: он же дозаполняет
+        # ленты строк, вставленных до обрыва импорта с resume
+        timeline.rebuild()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import compute
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитать рекомендации авторов: друзья друзей, авторы, '
+        'которых читают вместе, и активные авторы общих групп'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать всех, а не только затронутых новыми '
+                 'подписками',
+        )
+
+    def handle(self, *args, **options):
+        users = compute(full=options['full'], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации пересчитаны для {users} пользователей'
+        ))
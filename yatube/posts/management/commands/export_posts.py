@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import export_posts
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = 'Выгрузить посты с комментариями в NDJSON'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument('--author', help='username автора')
+        target.add_argument('--group', help='slug группы')
+        parser.add_argument(
+            '--output', help='Файл для выгрузки, по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        filters = {}
+        if options['author']:
+            filters['author'] = self._get(
+                User, username=options['author']
+            )
+        if options['group']:
+            filters['group'] = self._get(Group, slug=options['group'])
+        if not options['output']:
+            for line in export_posts(**filters):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8') as target:
+            target.writelines(export_posts(**filters))
+
+    def _get(self, model, **lookup):
+        try:
+            return model.objects.get(**lookup)
+        except model.DoesNotExist:
+            raise CommandError(f'Не найдено: {lookup}')
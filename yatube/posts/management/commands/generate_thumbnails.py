@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails, variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создать миниатюры и варианты картинок всех постов '
+        '(после деплоя)'
+    )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').values_list('id', flat=True)
+        for post_id in posts.iterator():
+            thumbnails.generate(post_id)
+            variants.generate(post_id)
+        self.stdout.write(self.style.SUCCESS('Миниатюры созданы'))
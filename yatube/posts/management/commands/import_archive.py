@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import KINDS, Importer, find_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортировать архив: users, groups, posts, comments и follows '
+        'из файлов <вид>.jsonl или <вид>.csv в каталоге'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument(
+            '--only', nargs='+', choices=KINDS, default=KINDS,
+            help='Импортировать только эти виды записей',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с места, записанного в <файл>.done',
+        )
+
+    def handle(self, *args, **options):
+        kinds = [kind for kind in KINDS if kind in options['only']]
+        if not any(find_file(options['directory'], kind) for kind in kinds):
+            raise CommandError('В каталоге нет файлов архива')
+        importer = Importer(log=self.stdout.write)
+        importer.run(options['directory'], kinds, resume=options['resume'])
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
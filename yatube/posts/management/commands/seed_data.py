@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.seed import DEFAULT_END, seed
+
+
+def _end_date(value):
+    # 2024-06-01 или 2024-06-01T12:00:00; без зоны — UTC
+    end = datetime.fromisoformat(value)
+    if timezone.is_naive(end):
+        end = timezone.make_aware(end, timezone.utc)
+    return end
+
+
+class Command(BaseCommand):
+    help = (
+        'Сгенерировать воспроизводимый набор данных для нагрузочных '
+        'тестов: пользователи, группы, посты, комментарии и подписки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1000, help='Число постов'
+        )
+        parser.add_argument(
+            '--users', type=int,
+            help='Число пользователей, по умолчанию posts / 20',
+        )
+        parser.add_argument(
+            '--groups', type=int,
+            help='Число групп, по умолчанию users / 100',
+        )
+        parser.add_argument(
+            '--comments', type=float, default=2.0,
+            help='Среднее число комментариев на пост',
+        )
+        parser.add_argument(
+            '--follows', type=float, default=10.0,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой, от 0 до 1',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько последних дней распределить посты',
+        )
+        parser.add_argument(
+            '--end', type=_end_date, default=DEFAULT_END,
+            help='Дата последнего поста (ISO 8601), по умолчанию '
+                 f'{DEFAULT_END.date()}',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и slug групп',
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] < 1:
+            raise CommandError('Число постов должно быть положительным')
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('Доля картинок должна быть от 0 до 1')
+        dataset = seed(
+            log=self.stdout.write,
+            **{
+                name: options[name] for name in (
+                    'posts', 'users', 'groups', 'comments', 'follows',
+                    'images', 'days', 'end', 'seed', 'prefix',
+                )
+            },
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {dataset.users_count} пользователей, '
+            f'{dataset.groups_count} групп, {dataset.posts_count} постов'
+        ))
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -59,13 +60,50 @@ class Post(models.Model):
         blank=True,
     )
 
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев',
+    )
+
+    image_widths = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name='Ширины готовых вариантов картинки',
+    )
+
     def __str__(self):
         return self.text[:1000]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Запоминаем группу при загрузке, чтобы при переносе поста
+        # поправить счётчики обеих групп
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
     class Meta:
         ordering = ['-pub_date']
         verbose_name_plural = 'Посты'
         verbose_name = 'Пост'
+        # Индексы под ленты: сортировка (pub_date, id) без временной
+        # сортировки, в том числе внутри автора и группы
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx',
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -103,6 +141,12 @@ class Comment(models.Model):
     class Meta:
         ordering = ['-data_created']
         verbose_name = 'Комментарий'
+        indexes = [
+            models.Index(
+                fields=['post', '-data_created', '-id'],
+                name='comment_post_feed_idx',
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -110,7 +154,7 @@ class Follow(models.Model):
     user = models.ForeignKey(
         User,
         related_name='follower',
-        on_delete=None
+        on_delete=models.CASCADE
     )
     # пользователь, на которого подписывются
     author = models.ForeignKey(
@@ -118,3 +162,208 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE
     )
+
+    class Meta:
+        # Списки подписчиков и подписок листаются курсором по id:
+        # для любого автора страница — короткий проход по индексу
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='follow_followers_idx',
+            ),
+            models.Index(
+                fields=['user', '-id'],
+                name='follow_following_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow',
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Строка материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+    )
+    # Копии автора и даты поста: лента читается и чистится
+    # без соединения с таблицей постов
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+    )
+    pub_date = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+    class Meta:
+        verbose_name_plural = 'Ленты подписок'
+        verbose_name = 'Запись ленты подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_author_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_post',
+            ),
+        ]
+
+
+class UserCounterManager(models.Manager):
+    def bump(self, user_id, **deltas):
+        # Атомарно меняет счётчики через F(), создавая строку при нужде;
+        # уменьшение не уводит счётчик ниже нуля, если строки были
+        # созданы в обход представлений (это поправит recount_counters)
+        changes = {
+            field: F(field) + delta for field, delta in deltas.items()
+        }
+        rows = self.filter(user_id=user_id, **{
+            f'{field}__gte': -delta
+            for field, delta in deltas.items() if delta < 0
+        })
+        if not rows.update(**changes):
+            # Строку мог создать соседний запрос между update и
+            # get_or_create: изменение применяем в любом случае
+            self.get_or_create(user_id=user_id)
+            rows.update(**changes)
+
+
+class UserCounter(models.Model):
+    """Денормализованные счётчики пользователя для профиля и постов."""
+    user = models.OneToOneField(
+        User,
+        primary_key=True,
+        related_name='counters',
+        on_delete=models.CASCADE,
+    )
+
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков',
+    )
+
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок',
+    )
+
+    objects = UserCounterManager()
+
+    def __str__(self):
+        return str(self.user_id)
+
+    class Meta:
+        verbose_name_plural = 'Счётчики пользователей'
+        verbose_name = 'Счётчики пользователя'
+
+
+class Suggestion(models.Model):
+    """
+    Автор, которого стоит предложить пользователю. Строки пишет
+    пакетная команда compute_suggestions (posts.recommendations),
+    страницы только читают их по индексу (user, -score).
+    """
+    FRIENDS = 1
+    COFOLLOWED = 2
+    GROUP = 3
+    REASONS = (
+        (FRIENDS, 'Читают ваши подписки'),
+        (COFOLLOWED, 'Читают вместе с вашими авторами'),
+        (GROUP, 'Активен в ваших группах'),
+    )
+
+    # Отдельный индекс по user не нужен: его покрывает составной
+    user = models.ForeignKey(
+        User,
+        related_name='suggestions',
+        on_delete=models.CASCADE,
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE,
+    )
+    score = models.FloatField()
+    reason = models.PositiveSmallIntegerField(choices=REASONS)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.author_id}'
+
+    class Meta:
+        verbose_name_plural = 'Рекомендации авторов'
+        verbose_name = 'Рекомендация автора'
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_suggestion',
+            ),
+        ]
+
+
+class SearchField(models.TextField):
+    """Колонка полнотекстового индекса: поддерживает lookup match."""
+
+
+@SearchField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearch(models.Model):
+    """
+    Виртуальная таблица FTS5 над текстом постов. Создаётся и
+    поддерживается триггерами из posts.search, только для чтения.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+        on_delete=models.DO_NOTHING,
+    )
+
+    text = SearchField()
+
+    # Скрытая колонка FTS5: bm25, чем меньше, тем релевантнее
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
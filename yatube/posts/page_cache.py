@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from .cache_versions import get_state
+
+
+def cache_anonymous_page(scopes):
+    """
+    Кэширует страницу целиком для гостей и отвечает на условные GET.
+
+    scopes(**kwargs) получает аргументы представления и возвращает
+    области из posts.cache_versions, от которых зависит страница:
+    ETag строится из их версий и адреса, Last-Modified — из времени
+    последнего изменения. Совпавший ETag даёт 304 без обращения к
+    представлению, иначе ответ берётся из кэша или рендерится и
+    кладётся туда до следующей смены версии.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            version, modified = get_state(*scopes(**kwargs))
+            digest = hashlib.md5(
+                f'{request.get_full_path()}|{version}'.encode()
+            ).hexdigest()
+            etag = quote_etag(digest)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=modified
+            )
+            if response is None:
+                key = f'anonymous_page:{digest}'
+                response = cache.get(key)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code == 200 and not response.cookies:
+                        cache.set(
+                            key, response, settings.FRAGMENT_CACHE_TIMEOUT
+                        )
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(modified)
+                patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
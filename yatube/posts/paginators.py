@@ -0,0 +1,269 @@
+import base64
+import json
+import math
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERING = ('-data_created', '-id')
+FOLLOW_ORDERING = ('-id',)
+# Диапазон INTEGER в SQLite: больший id из курсора не дойдёт до запроса
+INTEGER_RANGE = (-2 ** 63, 2 ** 63 - 1)
+TIMELINE_ORDERING = ('-pub_date', '-post_id')
+ELLIPSIS = '…'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values, reverse=False):
+    # Непрозрачный токен: значения ключа сортировки и направление
+    payload = json.dumps(
+        {'v': list(values), 'r': int(reverse)},
+        # isoformat без округления: иначе микросекунды ключа потеряются
+        default=lambda value: value.isoformat(),
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields=None):
+    """
+    Значения ключа и направление из токена. Если переданы поля модели
+    ключа, значения проверяются и приводятся их to_python: курсор
+    приходит от клиента, и подделанный не должен дойти до запроса.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, reverse = payload['v'], bool(payload['r'])
+    except (TypeError, ValueError, KeyError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    if fields is None:
+        return values, reverse
+    if len(values) != len(fields) or None in values:
+        raise InvalidCursor(cursor)
+    try:
+        values = [
+            field.to_python(value) for field, value in zip(fields, values)
+        ]
+    except (TypeError, ValueError, ValidationError):
+        raise InvalidCursor(cursor)
+    if not all(map(_storable, values)):
+        raise InvalidCursor(cursor)
+    return values, reverse
+
+
+def _storable(value):
+    # to_python пропускает None, любые целые и inf/nan
+    if value is None:
+        return False
+    if isinstance(value, int):
+        return INTEGER_RANGE[0] <= value <= INTEGER_RANGE[1]
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return True
+
+
+class CursorPage(Page):
+    """Страница keyset-паджинатора: без номеров, только соседи."""
+    is_cursor = True
+
+    def __init__(self, rows, paginator, cursor, has_next, has_previous):
+        # rows — строки выборки, по ним строятся курсоры; на странице
+        # показываются объекты, которые из них достаёт paginator.unwrap
+        object_list = rows
+        if paginator.unwrap is not None:
+            object_list = [paginator.unwrap(row) for row in rows]
+        super().__init__(object_list, None, paginator)
+        self.rows = rows
+        self.cursor = cursor
+        # Устаревший курсор (записи после него удалены) даёт пустую
+        # страницу: соседей не от чего отсчитывать
+        self._has_next = has_next and bool(rows)
+        self._has_previous = has_previous and bool(rows)
+
+    def __repr__(self):
+        return '<Page cursor=%s>' % (self.cursor or '')
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.cursor_for(self.rows[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.cursor_for(self.rows[0], reverse=True)
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator(Paginator):
+    """
+    Паджинатор по ключу сортировки (по умолчанию (pub_date, id)).
+    Вместо LIMIT/OFFSET фильтрует по значениям последней показанной
+    записи, поэтому глубина страницы не влияет на стоимость запроса.
+    """
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 unwrap=None):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+        self.unwrap = unwrap
+
+    @cached_property
+    def key_fields(self):
+        # Поля ключа сортировки для проверки курсора: поле модели или
+        # тип аннотации (rank поиска)
+        meta = self.object_list.model._meta
+        annotations = self.object_list.query.annotations
+        return [
+            annotations[name].output_field if name in annotations
+            else meta.get_field(name)
+            for name in (field.lstrip('-') for field in self.ordering)
+        ]
+
+    def _keyset_filter(self, values, reverse):
+        # Лексикографическое сравнение (a, b) < (x, y) через Q-объекты
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _ordered(self, reverse):
+        if not reverse:
+            return self.object_list.order_by(*self.ordering)
+        return self.object_list.order_by(*(
+            field[1:] if field.startswith('-') else '-' + field
+            for field in self.ordering
+        ))
+
+    def cursor_for(self, obj, reverse=False):
+        # Строка выборки — объект или словарь из values()
+        get = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        values = [get(field.lstrip('-')) for field in self.ordering]
+        return encode_cursor(values, reverse)
+
+    def page(self, cursor=None):
+        values, reverse = None, False
+        if cursor:
+            values, reverse = decode_cursor(cursor, self.key_fields)
+        queryset = self._ordered(reverse)
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+        # Одна лишняя запись показывает, есть ли следующая страница
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if reverse:
+            object_list.reverse()
+            return CursorPage(
+                object_list, self, cursor,
+                has_next=True, has_previous=has_more,
+            )
+        return CursorPage(
+            object_list, self, cursor,
+            has_next=has_more, has_previous=values is not None,
+        )
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except (InvalidCursor, ValidationError):
+            return self.page()
+
+
+def count_key(*parts):
+    # Ключ кэша для числа записей ленты: ('all',), ('group', id) и т.п.
+    return 'post_count:' + ':'.join(str(part) for part in parts)
+
+
+def incr_count(key, delta=1):
+    # Меняем только уже посчитанное значение: отсутствующий ключ
+    # пересчитается при следующем обращении
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+class CountedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.elided_page_range(self.number)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Паджинатор по номерам страниц, который берёт общее число записей
+    из кэша вместо SELECT COUNT(*) на каждый запрос.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        count = cache.get(self.count_key)
+        if count is None:
+            count = super().count
+            cache.add(self.count_key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return CountedPage(*args, **kwargs)
+
+    def elided_page_range(self, number, on_each_side=2, on_ends=1):
+        # Первые/последние страницы и соседи текущей, между ними «…»
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(num_pages - on_ends + 1, num_pages + 1)
+        else:
+            yield from range(number + 1, num_pages + 1)
@@ -0,0 +1,116 @@
+import re
+
+from django.db.models import F
+
+from .models import Post
+
+TABLE = 'posts_post_fts'
+
+# Сначала самые релевантные, при равенстве — новые
+SEARCH_ORDERING = ('rank', '-id')
+
+# Токенайзер unicode61 не приравнивает «ё» к «е»: индексируем текст
+# с заменой, а запрос нормализуем так же в match_expression
+INDEXED_TEXT = "replace(replace({}.text, 'ё', 'е'), 'Ё', 'Е')"
+
+SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    f"text, content='', tokenize='unicode61 remove_diacritics 2')",
+)
+
+# Индекс без копии текста (content=''), синхронизируется триггерами:
+# они ловят и bulk_create, и update(). Для удаления FTS5 нужен
+# прежний текст, поэтому он передаётся в команду 'delete'
+_INSERT = f'INSERT INTO {TABLE} (rowid, text) VALUES (new.id, %s); ' % (
+    INDEXED_TEXT.format('new')
+)
+_DELETE = (
+    f"INSERT INTO {TABLE} ({TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, %s); " % INDEXED_TEXT.format('old')
+)
+TRIGGERS = {
+    f'{TABLE}_insert': (
+        f'CREATE TRIGGER IF NOT EXISTS {TABLE}_insert '
+        f'AFTER INSERT ON posts_post BEGIN {_INSERT}END'
+    ),
+    f'{TABLE}_delete': (
+        f'CREATE TRIGGER IF NOT EXISTS {TABLE}_delete '
+        f'AFTER DELETE ON posts_post BEGIN {_DELETE}END'
+    ),
+    f'{TABLE}_update': (
+        f'CREATE TRIGGER IF NOT EXISTS {TABLE}_update '
+        f'AFTER UPDATE OF text ON posts_post BEGIN {_DELETE}{_INSERT}END'
+    ),
+}
+
+
+def install(connection):
+    """
+    Создаёт индекс и триггеры, если их нет, и заполняет индекс
+    заново, если триггеров не было. Вызывается миграцией и после
+    каждого migrate: SQLite-бэкенд Django пересоздаёт posts_post при
+    изменении полей, и триггеры старой таблицы пропадают.
+    """
+    if (connection.vendor != 'sqlite'
+            or 'posts_post' not in connection.introspection.table_names()):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            "AND tbl_name = 'posts_post'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        missing = set(TRIGGERS) - existing
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                f"INSERT INTO {TABLE} ({TABLE}) VALUES ('delete-all')"
+            )
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, text) SELECT id, %s '
+                f'FROM posts_post' % INDEXED_TEXT.format('posts_post')
+            )
+
+
+def drop_triggers(connection):
+    """Отключает синхронизацию; install включит её и перестроит индекс."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def uninstall(connection):
+    if connection.vendor != 'sqlite':
+        return
+    drop_triggers(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def match_expression(query):
+    """
+    Строка поиска -> выражение FTS5: все слова обязательны, последнее
+    ищется по префиксу. Слова берутся в кавычки, поэтому операторы
+    FTS5 из ввода не исполняются. None, если слов нет.
+    """
+    words = re.findall(r'\w+', query.lower().replace('ё', 'е'))
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_posts(query, queryset=None):
+    """Посты, подходящие под запрос, с релевантностью в rank."""
+    expression = match_expression(query)
+    queryset = Post.objects.all() if queryset is None else queryset
+    queryset = queryset.annotate(rank=F('search__rank'))
+    if expression is None:
+        return queryset.none()
+    return queryset.filter(search__text__match=expression)
@@ -0,0 +1,238 @@
+import io
+import random
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from .importer import KINDS, Importer, parse_date
+from .models import Post
+
+WORDS = (
+    'город', 'дом', 'кот', 'река', 'лес', 'утро', 'вечер', 'дорога',
+    'книга', 'письмо', 'друг', 'сад', 'море', 'ветер', 'снег', 'дождь',
+    'окно', 'поезд', 'музыка', 'песня', 'работа', 'отпуск', 'кофе',
+    'чай', 'небо', 'солнце', 'луна', 'звезда', 'мост', 'улица', 'парк',
+    'старый', 'новый', 'тихий', 'яркий', 'тёплый', 'холодный', 'долгий',
+    'быстро', 'медленно', 'сегодня', 'вчера', 'снова', 'вместе', 'рядом',
+    'видел', 'читал', 'слушал', 'думал', 'шёл', 'ждал', 'писал', 'нашёл',
+    'и', 'в', 'на', 'с', 'про', 'под', 'над', 'без', 'очень', 'почти',
+)
+FIRST_NAMES = (
+    'Анна', 'Иван', 'Мария', 'Пётр', 'Ольга', 'Лев', 'Дарья', 'Олег',
+    'Елена', 'Сергей', 'Вера', 'Антон',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Соколов', 'Лебедев',
+    'Козлов', 'Новиков', 'Морозов', 'Волков',
+)
+
+# Показатель закона Ципфа для активности авторов и популярности
+# групп: несколько авторов пишут большую часть постов
+ZIPF_EXPONENT = 1.1
+# Хвост распределения подписок: у большинства их мало, у единиц —
+# тысячи (Парето с alpha = 1.5 имеет среднее 3)
+FOLLOWS_ALPHA = 1.5
+# Доля постов в группах
+GROUP_SHARE = 0.6
+# Картинки берутся из небольшого пула: постам нужно имя файла,
+# а не уникальное содержимое
+IMAGE_POOL = 16
+IMAGE_SIZE = (1280, 720)
+# Дата последнего поста по умолчанию: от текущего времени даты
+# менялись бы с каждым запуском, и зерно не повторяло бы набор
+DEFAULT_END = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _cumulative_zipf(count):
+    return list(accumulate(
+        1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(count)
+    ))
+
+
+class Dataset:
+    """
+    Воспроизводимый синтетический набор данных в формате записей
+    архива import_archive. Каждый вид записей генерируется своим
+    Random от seed, поэтому одинаковые параметры дают одинаковые
+    данные. Записи создаются лениво: память не зависит от объёма.
+    """
+
+    def __init__(self, posts, users=None, groups=None, comments=2.0,
+                 follows=10.0, images=0.0, days=365, seed=0,
+                 prefix='seed', first_post_id=1, end=None):
+        self.posts_count = posts
+        self.users_count = users or max(10, posts // 20)
+        self.groups_count = groups or max(1, self.users_count // 100)
+        self.comments_mean = comments
+        self.follows_mean = follows
+        self.images_share = images
+        self.seed = seed
+        self.prefix = prefix
+        self.first_post_id = first_post_id
+        self.end = end or DEFAULT_END
+        self.step = timedelta(days=days) / max(posts, 1)
+        self.start = self.end - self.step * posts
+        self.image_names = []
+        self._author_weights = _cumulative_zipf(self.users_count)
+        self._group_weights = _cumulative_zipf(self.groups_count)
+
+    def _random(self, kind):
+        return random.Random(f'{self.seed}:{kind}')
+
+    def _pick(self, rnd, cumulative):
+        # Как random.choices, но без построения списка на каждый вызов
+        return bisect(cumulative, rnd.random() * cumulative[-1])
+
+    def username(self, number):
+        return f'{self.prefix}{number}'
+
+    def _date(self, number):
+        return self.start + self.step * number
+
+    def _text(self, rnd, median):
+        length = min(400, max(3, int(rnd.lognormvariate(0, 0.8) * median)))
+        return ' '.join(rnd.choices(WORDS, k=length)).capitalize() + '.'
+
+    def users(self):
+        rnd = self._random('users')
+        for number in range(self.users_count):
+            yield {
+                'username': self.username(number),
+                'first_name': rnd.choice(FIRST_NAMES),
+                'last_name': rnd.choice(LAST_NAMES),
+                'email': f'{self.username(number)}@example.com',
+            }
+
+    def groups(self):
+        rnd = self._random('groups')
+        for number in range(self.groups_count):
+            yield {
+                'slug': f'{self.prefix}-group-{number}',
+                'title': self._text(rnd, 2)[:200],
+                'description': self._text(rnd, 20),
+            }
+
+    def posts(self):
+        rnd = self._random('posts')
+        for number in range(self.posts_count):
+            record = {
+                'id': self.first_post_id + number,
+                'author': self.username(
+                    self._pick(rnd, self._author_weights)
+                ),
+                'text': self._text(rnd, 30),
+                'pub_date': (
+                    self._date(number) + self.step * rnd.random()
+                ).isoformat(),
+            }
+            if rnd.random() < GROUP_SHARE:
+                group = self._pick(rnd, self._group_weights)
+                record['group'] = f'{self.prefix}-group-{group}'
+            if self.image_names and rnd.random() < self.images_share:
+                record['image'] = rnd.choice(self.image_names)
+            yield record
+
+    def comments(self):
+        rnd = self._random('comments')
+        if not self.comments_mean:
+            return
+        for number in range(self.posts_count):
+            # Экспоненциальное число комментариев: у многих постов их
+            # нет, у немногих — десятки
+            count = int(rnd.expovariate(1 / self.comments_mean) + 0.5)
+            for _ in range(count):
+                created = self._date(number) + timedelta(
+                    minutes=rnd.expovariate(1 / 120)
+                )
+                yield {
+                    'post': self.first_post_id + number,
+                    'author': self.username(rnd.randrange(self.users_count)),
+                    'text': self._text(rnd, 8),
+                    'created': min(created, self.end).isoformat(),
+                }
+
+    def follows(self):
+        rnd = self._random('follows')
+        if not self.follows_mean:
+            return
+        scale = self.follows_mean * (FOLLOWS_ALPHA - 1) / FOLLOWS_ALPHA
+        for user in range(self.users_count):
+            count = min(
+                self.users_count - 1,
+                int(rnd.paretovariate(FOLLOWS_ALPHA) * scale),
+            )
+            # Популярность совпадает с активностью: на плодовитых
+            # авторов подписываются чаще, число подписчиков — степенное
+            authors = {
+                self._pick(rnd, self._author_weights) for _ in range(count)
+            }
+            authors.discard(user)
+            for author in sorted(authors):
+                yield {
+                    'user': self.username(user),
+                    'author': self.username(author),
+                }
+
+    def prepare_images(self):
+        """Сохраняет пул картинок в хранилище, если их там ещё нет."""
+        if not self.images_share:
+            return
+        rnd = self._random('images')
+        for number in range(IMAGE_POOL):
+            name = f'posts/seed/{self.prefix}-{number}.jpg'
+            color = tuple(rnd.randrange(256) for _ in range(3))
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', IMAGE_SIZE, color).save(
+                    buffer, 'JPEG', quality=85
+                )
+                name = default_storage.save(name, ContentFile(
+                    buffer.getvalue()
+                ))
+            self.image_names.append(name)
+
+
+class SeedImporter(Importer):
+    """
+    Импорт сгенерированных записей. В отличие от архива, ссылки в них
+    заведомо верны, поэтому множество id постов в памяти не копится.
+    """
+
+    def after_posts(self, rows):
+        for _, author_id, group_id, *_ in rows:
+            self.authors.add(author_id)
+            if group_id:
+                self.groups.add(group_id)
+
+    def build_comments(self, record):
+        created = parse_date(record['created'])
+        return (
+            record['post'],
+            self.user_ids[record['author']],
+            record['text'],
+            created,
+            created,
+        )
+
+
+def seed(log=None, **options):
+    """Генерирует и загружает набор данных; возвращает Dataset."""
+    last_id = Post.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    dataset = Dataset(first_post_id=last_id + 1, **options)
+    dataset.prepare_images()
+    importer = SeedImporter(log)
+    with importer.bulk():
+        for kind in KINDS:
+            imported, skipped = importer.import_records(
+                kind, getattr(dataset, kind)()
+            )
+            importer.log(
+                f'{kind}: вставлено {imported}, пропущено {skipped}'
+            )
+    return dataset
@@ -0,0 +1,105 @@
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from core.background import run_in_background
+
+from . import cache_versions, follow_graph, search, timeline
+from .models import Comment, Follow, Group, Post, User, UserCounter
+from .paginators import count_key, incr_count
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    old_group_id = getattr(instance, '_loaded_group_id', None)
+    instance._loaded_group_id = instance.group_id
+    cache_versions.bump_on_commit(*cache_versions.post_scopes(
+        instance.id, instance.author_id, old_group_id, instance.group_id
+    ))
+    # Поддерживаем закэшированные числа постов лент без COUNT(*)
+    if created:
+        run_in_background(timeline.fan_out_post, instance.id)
+        incr_count(count_key('all'))
+        incr_count(count_key('author', instance.author_id))
+        if instance.group_id:
+            incr_count(count_key('group', instance.group_id))
+        return
+    if old_group_id != instance.group_id:
+        if old_group_id:
+            incr_count(count_key('group', old_group_id), -1)
+        if instance.group_id:
+            incr_count(count_key('group', instance.group_id))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    cache_versions.bump_on_commit(*cache_versions.post_scopes(
+        instance.id, instance.author_id, instance.group_id
+    ))
+    incr_count(count_key('all'), -1)
+    incr_count(count_key('author', instance.author_id), -1)
+    if instance.group_id:
+        incr_count(count_key('group', instance.group_id), -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # Название и slug группы выводятся в лентах
+    cache_versions.bump_on_commit('groups', f'group:{instance.id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    cache_versions.bump_on_commit(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    # Число постов ленты подписок пересчитается при следующем запросе
+    cache.delete(count_key('follow', instance.user_id))
+    follow_graph.forget_on_commit(instance.user_id)
+    # Счётчики подписок выводятся в профилях
+    cache_versions.bump_on_commit(
+        f'follows:{instance.user_id}', f'follows:{instance.author_id}'
+    )
+    if created:
+        run_in_background(
+            timeline.backfill, instance.user_id, instance.author_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    cache.delete(count_key('follow', instance.user_id))
+    follow_graph.forget_on_commit(instance.user_id)
+    cache_versions.bump_on_commit(
+        f'follows:{instance.user_id}', f'follows:{instance.author_id}'
+    )
+    run_in_background(timeline.prune, instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Строка счётчиков нужна профилю и посту с первого запроса
+    if created:
+        UserCounter.objects.get_or_create(user=instance)
+        return
+    # Вход обновляет только last_login: имя в лентах не поменялось
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    cache_versions.bump_on_commit('users', f'author:{instance.id}')
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    cache_versions.bump_on_commit('users', f'author:{instance.id}')
+
+
+@receiver(post_migrate)
+def search_index_installed(sender, using, **kwargs):
+    # Триггеры индекса пропадают, когда миграция пересоздаёт posts_post
+    if sender.name == 'posts':
+        search.install(connections[using])
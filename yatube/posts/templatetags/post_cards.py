@@ -0,0 +1,16 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, variant):
+    # {% post_cards page_obj "index" as cards %}: HTML карточек страницы
+    # из кэша, см. posts.cards.render_cards
+    return [
+        mark_safe(card) for card in
+        render_cards(list(posts), variant, context.get('thumbnails'))
+    ]
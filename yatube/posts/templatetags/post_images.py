@@ -0,0 +1,39 @@
+from django import template
+from django.conf import settings
+
+from .. import variants
+from ..thumbnails import lookup
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_thumbnail(context, post, alias):
+    # Только чтение готовой миниатюры: обработка картинок в шаблонах
+    # запрещена, до готовности выводится заглушка. Страницы из
+    # представлений передают thumbnails — пакетное чтение на все посты
+    batch = context.get('thumbnails')
+    if batch is None:
+        return lookup(post.image, alias)
+    return batch.get(post, alias)
+
+
+@register.inclusion_tag('includes/post_image.html', takes_context=True)
+def post_image(context, post, alias, css_class=''):
+    """
+    Картинка поста под слот миниатюры alias: готовые варианты
+    posts.variants в WebP и JPEG через srcset, до их появления —
+    миниатюра или заглушка.
+    """
+    width = settings.POST_THUMBNAILS[alias][0].partition('x')[0]
+    result = {
+        'css_class': css_class,
+        'sizes': f'(max-width: {width}px) 100vw, {width}px',
+    }
+    if variants.parse_widths(post.image_widths):
+        result['webp_srcset'] = variants.srcset(post, 'webp')
+        result['jpeg_srcset'] = variants.srcset(post, 'jpg')
+        result['src'] = variants.fallback_url(post, int(width))
+    else:
+        result['thumbnail'] = post_thumbnail(context, post, alias)
+    return result
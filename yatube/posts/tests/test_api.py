@@ -0,0 +1,120 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Group, Post, User
+from .test_views import FORGED_CURSORS
+
+
+@override_settings(NUM_OF_POSTS=2, NUM_OF_COMMENTS=2)
+class PostsApiTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author,
+                group=cls.group if number % 2 else None,
+            )
+            for number in range(5)
+        ]
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.author, text=f'К {number}'
+            )
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'posts:{name}', args=args), params)
+
+    def test_feed_pages_with_sparse_fields(self):
+        """Проверить курсорные страницы ленты и выбор полей."""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get('api_posts', fields='id,author').json()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(data['results'], [
+            {'id': self.posts[4].id, 'author': 'author'},
+            {'id': self.posts[3].id, 'author': 'author'},
+        ])
+        seen = [row['id'] for row in data['results']]
+        while data['next']:
+            data = self.get(
+                'api_posts', fields='id', cursor=data['next']
+            ).json()
+            seen += [row['id'] for row in data['results']]
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+        full = self.get('api_post', self.posts[1].id).json()
+        self.assertEqual(full['text'], 'Пост 1')
+        self.assertEqual(full['group'], 'group')
+        self.assertIsNone(full['image'])
+
+    def test_group_profile_and_comments(self):
+        """Проверить ленты группы, автора и комментарии поста."""
+        data = self.get('api_group_posts', 'group', fields='text').json()
+        self.assertEqual(
+            data['results'], [{'text': 'Пост 3'}, {'text': 'Пост 1'}]
+        )
+        self.assertIsNone(data['next'])
+        data = self.get('api_profile_posts', 'author', limit=5).json()
+        self.assertEqual(len(data['results']), 5)
+        data = self.get('api_comments', self.posts[0].id).json()
+        self.assertEqual(
+            [row['text'] for row in data['results']], ['К 2', 'К 1']
+        )
+        self.assertEqual(data['results'][0]['author'], 'author')
+
+    def test_batch_lookup_keeps_requested_order(self):
+        """Проверить пакетную выборку постов по ids."""
+        ids = [self.posts[3].id, 0, self.posts[0].id]
+        data = self.get(
+            'api_posts', ids=','.join(map(str, ids)), fields='text'
+        ).json()
+        self.assertEqual(
+            data['results'], [{'text': 'Пост 3'}, {'text': 'Пост 0'}]
+        )
+
+    def test_stale_cursor(self):
+        """Проверить курсор на удалённые записи."""
+        cursor = self.get('api_posts').json()['next']
+        Post.objects.filter(id__lt=self.posts[3].id).delete()
+        data = self.get('api_posts', cursor=cursor).json()
+        self.assertEqual(
+            (data['results'], data['next'], data['previous']),
+            ([], None, None),
+        )
+
+    def test_errors_are_json(self):
+        """Проверить ответы на неверные параметры и отсутствующие объекты."""
+        for name, args, params, status in (
+            ('api_posts', (), {'fields': 'id,password'}, 400),
+            ('api_posts', (), {'cursor': 'мусор'}, 400),
+            *(
+                ('api_posts', (), {'cursor': cursor}, 400)
+                for cursor in FORGED_CURSORS
+            ),
+            ('api_profile_posts', ('author',), {'cursor': FORGED_CURSORS[0]},
+             400),
+            ('api_posts', (), {'ids': '1,x'}, 400),
+            ('api_posts', (), {'limit': '0'}, 400),
+            ('api_posts', (), {'limit': '²'}, 400),
+            ('api_posts', (), {'ids': '²'}, 400),
+            ('api_posts', (), {'ids': '-1'}, 400),
+            ('api_posts', (), {'ids': '99999999999999999999999'}, 400),
+            ('api_group_posts', ('missing',), {}, 404),
+            ('api_post', (0,), {}, 404),
+        ):
+            with self.subTest(name=name, params=params):
+                response = self.get(name, *args, **params)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+        response = self.client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..cards import card_key, render_cards
+from ..models import Group, Post, User
+
+
+class PostCardsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self):
+        return list(Post.objects.select_related('author', 'group'))
+
+    def test_cards_read_with_one_get_many(self):
+        """Проверить, что готовые карточки читаются одним get_many."""
+        first = render_cards(self.page(), 'index')
+        with mock.patch.object(
+            cache, 'get_many', wraps=cache.get_many
+        ) as get_many, mock.patch.object(cache, 'set_many') as set_many:
+            second = render_cards(self.page(), 'index')
+        self.assertEqual(get_many.call_count, 1)
+        set_many.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertIn('Пост 2', second[0])
+
+    def test_changes_give_new_card(self):
+        """Проверить, что правка поста, автора и группы меняет карточку."""
+        post = self.page()[0]
+        keys = {card_key('index', post)}
+        post.text = 'Другой текст'
+        keys.add(card_key('index', post))
+        post.author.first_name = 'Лев'
+        keys.add(card_key('index', post))
+        post.group.title = 'Новая группа'
+        keys.add(card_key('index', post))
+        self.assertEqual(len(keys), 4)
+
+    def test_edited_post_shown_on_feed(self):
+        """Проверить, что после post_edit лента показывает новый текст."""
+        client = Client()
+        client.force_login(self.author)
+        index = reverse('posts:index')
+        self.assertContains(client.get(index), 'Пост 2')
+        post = Post.objects.get(text='Пост 2')
+        client.post(
+            reverse('posts:edit', args=[post.id]),
+            data={'text': 'Исправленный пост', 'group': self.group.id},
+        )
+        response = client.get(index)
+        self.assertContains(response, 'Исправленный пост')
+        self.assertNotContains(response, 'Пост 2')
+        author = User.objects.get(id=self.author.id)
+        author.first_name = 'Лев'
+        author.save()
+        self.assertContains(
+            client.get(reverse('posts:group_posts', args=['group'])), 'Лев'
+        )
+
+    def test_placeholder_cards_are_not_cached(self):
+        """Проверить, что карточку с заглушкой картинки не кэшируем."""
+        post = self.page()[0]
+        post.image.name = 'posts/picture.jpg'
+        render_cards([post], 'index')
+        self.assertIsNone(cache.get(card_key('index', post)))
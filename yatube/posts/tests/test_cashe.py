@@ -1,29 +1,86 @@
+from unittest import mock
+
 from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
-from ..models import Post, User
+from core.tests.utils import TempStorageMixin
+
+from ..cache_versions import get_versions
+from ..models import Comment, Follow, Group, Post, User
 
 
-class CacheTests(TestCase):
+class CacheTests(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
         cls.test_user = User.objects.create(username='cache')
+        cls.group = Group.objects.create(
+            title='Кэшируемая группа',
+            slug='cache-slug',
+            description='Тестовое описание',
+        )
         cls.post = Post.objects.create(
             text='Тесты = скука!',
             author=cls.test_user,
+            group=cls.group,
         )
 
         cls.INDEX = reverse('posts:index')
+        cls.GROUP = reverse('posts:group_posts', args=[cls.group.slug])
+        cls.PROFILE = reverse('posts:profile', args=[cls.test_user])
+
+    def setUp(self):
+        cache.clear()
 
     def test_pages_uses_correct_template(self):
         """Проверить кэш постов на корневой странице"""
         response = self.client.get(self.INDEX)
         cached_response_content = response.content
-        Post.objects.create(text='Второй пост', author=self.test_user)
+        # update() не шлёт сигналов: версия кэша не меняется
+        Post.objects.filter(id=self.post.id).update(text='Тайная правка')
         response = self.client.get(self.INDEX)
         self.assertEqual(cached_response_content, response.content)
         cache.clear()
         response = self.client.get(self.INDEX)
         self.assertNotEqual(cached_response_content, response.content)
+
+    def test_writes_invalidate_fragments(self):
+        """Проверить, что записи сразу сбрасывают кэш фрагментов"""
+        for url in (self.INDEX, self.GROUP, self.PROFILE):
+            self.client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.test_user, group=self.group
+        )
+        for url in (self.INDEX, self.GROUP, self.PROFILE):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+        self.group.slug = 'renamed-slug'
+        self.group.save()
+        self.assertContains(self.client.get(self.INDEX), 'renamed-slug')
+
+        self.test_user.first_name = 'Кэш'
+        self.test_user.last_name = 'Кэшев'
+        self.test_user.save()
+        self.assertContains(self.client.get(self.INDEX), 'Кэш Кэшев')
+
+    def test_versions_bumped_again_on_commit(self):
+        """Проверить, что версии меняются и после коммита записи."""
+        other = User.objects.create(username='other')
+        scopes = (
+            'posts', f'post:{self.post.id}', f'follows:{other.id}',
+        )
+        with mock.patch(
+            'posts.cache_versions.transaction.on_commit'
+        ) as on_commit:
+            Post.objects.create(text='Новый', author=self.test_user)
+            Comment.objects.create(
+                post=self.post, author=other, text='Комментарий'
+            )
+            Follow.objects.create(user=other, author=self.test_user)
+        # Страница, отрисованная до коммита, легла бы под этой версией
+        before_commit = get_versions(*scopes)
+        for args, _ in on_commit.call_args_list:
+            args[0]()
+        self.assertNotEqual(get_versions(*scopes), before_commit)
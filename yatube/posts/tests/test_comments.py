@@ -1,10 +1,16 @@
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.tests.utils import TempStorageMixin
+
 from ..models import Comment, Post, User
 
 
-class CommentTests(TestCase):
+class CommentTests(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -37,3 +43,117 @@ class CommentTests(TestCase):
         count_comments = Comment.objects.count()
         self.guest_client.post(CommentTests.comment_url)
         self.assertEqual(count_comments, Comment.objects.count())
+
+
+@override_settings(NUM_OF_COMMENTS=3)
+class CommentPagesTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(7)
+        ]
+        for number, reader in enumerate(readers):
+            Comment.objects.create(
+                post=cls.post, author=reader, text=f'Комментарий {number}'
+            )
+        cls.DETAIL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.COMMENTS = reverse('posts:comments', args=[cls.post.id])
+
+    def setUp(self):
+        cache.clear()
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    def test_first_page_inline_and_rest_by_fragment(self):
+        """Проверить первую страницу в посте и остальные фрагментами."""
+        client = Client()
+        response = client.get(self.DETAIL)
+        page = response.context['comments']
+        self.assertEqual(
+            self.texts(page),
+            ['Комментарий 6', 'Комментарий 5', 'Комментарий 4'],
+        )
+        self.assertContains(
+            response, f'{self.COMMENTS}?cursor={page.next_cursor}'
+        )
+        seen = self.texts(page)
+        cursor = page.next_cursor
+        while cursor:
+            response = client.get(self.COMMENTS, {'cursor': cursor})
+            self.assertTemplateUsed(response, 'includes/comments.html')
+            self.assertNotContains(response, '<html')
+            page = response.context['comments']
+            seen += self.texts(page)
+            cursor = page.next_cursor
+        self.assertEqual(
+            seen, [f'Комментарий {number}' for number in range(6, -1, -1)]
+        )
+        response = client.get(reverse('posts:comments', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_one_query_per_comment_page(self):
+        """Проверить, что страница комментариев — один запрос с автором."""
+        client = Client()
+        cursor = client.get(self.DETAIL).context['comments'].next_cursor
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.COMMENTS, {'cursor': cursor})
+        comment_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_comment' in query['sql']
+        ]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertIn('JOIN', comment_queries[0])
+
+    def test_invalid_comment_renders_post_page(self):
+        """Проверить, что пустой комментарий возвращает страницу поста."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            data={'text': ''},
+        )
+        self.assertTemplateUsed(response, 'posts/post_detail.html')
+        self.assertEqual(
+            len(response.context['comments']), settings.NUM_OF_COMMENTS
+        )
+
+    def test_script_submission_returns_fragment(self):
+        """Проверить ответ скрипту: фрагмент комментария или ошибки."""
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:add_comment', args=[self.post.id])
+        count = self.post.comments_count
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                url, data={'text': 'Новый'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertContains(response, 'Новый', status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+        self.assertFalse(any(
+            'posts_comment' in query['sql'] and 'SELECT' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, count + 1)
+        response = client.post(
+            url, data={'text': 'В JSON'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('В JSON', response.json()['html'])
+        response = client.post(
+            url, data={'text': ''},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 9)
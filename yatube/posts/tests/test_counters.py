@@ -0,0 +1,85 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import (Comment, Follow, Post, User, UserCounter,
+                      UserCounterManager)
+
+
+class CountersTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counted')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+        cls.CREATE = reverse('posts:create')
+        cls.COMMENT = reverse('posts:add_comment', args=[cls.post.id])
+        cls.FOLLOW = reverse('posts:profile_follow', args=['counted'])
+        cls.UNFOLLOW = reverse('posts:profile_unfollow', args=['counted'])
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def counters(self, user):
+        return UserCounter.objects.get(user=user)
+
+    def test_views_update_counters(self):
+        """Проверить, что представления меняют счётчики."""
+        self.author_client.post(self.CREATE, data={'text': 'Новый'})
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+
+        self.reader_client.post(self.COMMENT, data={'text': 'Ок'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+        self.reader_client.get(self.FOLLOW)
+        self.reader_client.get(self.FOLLOW)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+
+        self.reader_client.get(self.UNFOLLOW)
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+
+    def test_bump_keeps_delta_when_row_created_concurrently(self):
+        """Проверить, что строка, созданная соседом, получает изменение."""
+        UserCounter.objects.filter(user=self.reader).delete()
+
+        def created_by_other_request(**lookup):
+            counters = UserCounter.objects.filter(**lookup).first()
+            return counters or UserCounter.objects.create(**lookup), False
+
+        with mock.patch.object(
+            UserCounterManager, 'get_or_create',
+            side_effect=created_by_other_request,
+        ):
+            UserCounter.objects.bump(self.reader.id, posts_count=1)
+            UserCounter.objects.bump(self.reader.id, following_count=-1)
+        counters = self.counters(self.reader)
+        self.assertEqual(counters.posts_count, 1)
+        self.assertEqual(counters.following_count, 0)
+
+    def test_recount_counters_command(self):
+        """Проверить пересчёт счётчиков командой recount_counters."""
+        Post.objects.create(text='Ещё', author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text='К')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounter.objects.filter(user=self.reader).delete()
+
+        call_command('recount_counters', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.counters(self.author).posts_count, 2)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Group, Post, User
+
+
+def parse(lines):
+    return [json.loads(line) for line in lines.splitlines() if line]
+
+
+@override_settings(BATCH_SIZE=2)
+class ExportPostsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        Post.objects.create(text='Чужой пост', author=cls.reader)
+        for text in ('Первый', 'Второй'):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=text
+            )
+        cls.PROFILE_EXPORT = reverse(
+            'posts:profile_export', kwargs={'username': 'author'}
+        )
+        cls.GROUP_EXPORT = reverse(
+            'posts:group_export', kwargs={'slug': 'group'}
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_profile_export_streams_posts_with_comments(self):
+        """Проверить потоковую выгрузку постов автора с комментариями."""
+        response = self.client.get(self.PROFILE_EXPORT)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        self.assertIn('author.ndjson', response['Content-Disposition'])
+        records = parse(b''.join(response.streaming_content).decode())
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.id for post in self.posts],
+        )
+        first = records[0]
+        self.assertEqual(first['author'], 'author')
+        self.assertEqual(first['group'], 'group')
+        self.assertEqual(first['text'], 'Пост 0')
+        self.assertEqual(
+            [comment['text'] for comment in first['comments']],
+            ['Первый', 'Второй'],
+        )
+        self.assertEqual(first['comments'][0]['author'], 'reader')
+        self.assertEqual(records[1]['comments'], [])
+
+    def test_queries_are_bounded_per_batch(self):
+        """Проверить, что на пачку постов уходит постоянное число запросов."""
+        response = self.client.get(self.GROUP_EXPORT)
+        with CaptureQueriesContext(connection) as queries:
+            records = parse(b''.join(response.streaming_content).decode())
+        self.assertEqual(len(records), 5)
+        # Три пачки по 2 поста и пустая: пост-запрос плюс комментарии
+        self.assertEqual(len(queries), 3 * 2 + 1)
+
+    def test_export_requires_login_and_existing_target(self):
+        """Проверить 404 для неизвестных и редирект для анонима."""
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': 'missing'})
+        )
+        self.assertEqual(response.status_code, 404)
+        response = Client().get(self.PROFILE_EXPORT)
+        self.assertEqual(response.status_code, 302)
+
+    def test_command_writes_file(self):
+        """Проверить выгрузку командой в файл и в stdout."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'group.ndjson')
+        call_command('export_posts', '--group', 'group', '--output', path)
+        with open(path, encoding='utf-8') as source:
+            self.assertEqual(len(parse(source.read())), 5)
+        stdout = StringIO()
+        call_command('export_posts', stdout=stdout)
+        self.assertEqual(len(parse(stdout.getvalue())), 6)
@@ -1,13 +1,17 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Comment, Follow, Group, Post
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Follow, Group, Post, TimelineEntry
 
 User = get_user_model()
 
 
-class FollowViewTest(TestCase):
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class FollowViewTest(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -108,3 +112,41 @@ class FollowViewTest(TestCase):
             self.post.text,
             response.context['page_obj'].object_list
         )
+
+    def test_follow_twice_keeps_single_row(self):
+        """Проверить, что повторная подписка не создаёт дубликат"""
+        self.authorized_client.get(self.PROF_FOLLOW)
+        self.authorized_client.get(self.PROF_FOLLOW)
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=self.user_2).count(),
+            1
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=self.user_2)
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Проверить заполнение и очистку ленты при (от)писке"""
+        self.authorized_client.get(self.PROF_FOLLOW)
+        Post.objects.create(author=self.user_2, text='Пост после подписки')
+        timeline = TimelineEntry.objects.filter(
+            user=self.user, author=self.user_2
+        )
+        self.assertEqual(
+            timeline.count(),
+            Post.objects.filter(author=self.user_2).count()
+        )
+        self.authorized_client.get(self.PROF_UNFOLLOW)
+        self.assertFalse(timeline.exists())
+
+    def test_timeline_fan_out_to_every_follower(self):
+        """Проверить раскладку поста по лентам всех подписчиков"""
+        followers = User.objects.bulk_create(
+            User(username=f'follower_{i}') for i in range(5)
+        )
+        for follower in User.objects.filter(username__startswith='follower_'):
+            Follow.objects.create(user=follower, author=self.user)
+        post = Post.objects.create(author=self.user, text='Всем подписчикам')
+        self.assertEqual(
+            TimelineEntry.objects.filter(post=post).count(),
+            len(followers) + 1
+        )
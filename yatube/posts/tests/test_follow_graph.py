@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..follow_graph import following_ids
+from ..models import Follow, Post, User
+
+
+class FollowGraphTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        Post.objects.create(text='Пост автора', author=cls.author)
+        Post.objects.create(text='Чужой пост', author=cls.other)
+        cls.PROFILE = reverse('posts:profile', args=['author'])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_follow' in query['sql']
+        ]
+
+    def test_profile_reads_follow_state_from_cache(self):
+        """Проверить, что состояние подписки берётся из кэша."""
+        response, queries = self.follow_queries(self.PROFILE)
+        self.assertFalse(response.context['following'])
+        self.assertEqual(len(queries), 1)
+        response, queries = self.follow_queries(self.PROFILE)
+        self.assertFalse(response.context['following'])
+        self.assertEqual(queries, [])
+
+    def test_follow_and_unfollow_refresh_cache(self):
+        """Проверить, что подписка и отписка обновляют множество."""
+        self.assertEqual(following_ids(self.reader.id), frozenset())
+        self.client.get(reverse('posts:profile_follow', args=['author']))
+        self.assertEqual(
+            following_ids(self.reader.id), frozenset([self.author.id])
+        )
+        self.assertTrue(self.client.get(self.PROFILE).context['following'])
+        self.client.get(reverse('posts:profile_unfollow', args=['author']))
+        self.assertFalse(self.client.get(self.PROFILE).context['following'])
+        Follow.objects.create(user=self.reader, author=self.other)
+        self.assertEqual(
+            following_ids(self.reader.id), frozenset([self.other.id])
+        )
+
+    def test_numbered_follow_feed_uses_author_set(self):
+        """Проверить ленту подписок ?page= по множеству авторов."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(reverse('posts:follow_index'), {'page': 1})
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Пост автора'],
+        )
@@ -0,0 +1,83 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..counters import recount
+from ..models import Follow, User
+
+
+@override_settings(NUM_OF_FOLLOWS=2)
+class FollowListsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='star')
+        cls.fans = [
+            User.objects.create_user(
+                username=f'fan{number}', first_name=f'Имя{number}'
+            )
+            for number in range(5)
+        ]
+        for fan in cls.fans:
+            Follow.objects.create(user=fan, author=cls.star)
+        Follow.objects.create(user=cls.star, author=cls.fans[0])
+        recount()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_followers_page_walks_all_with_cursor(self):
+        """Проверить курсорные страницы подписчиков одним запросом."""
+        url = reverse('posts:followers', args=['star'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        follow_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'posts_follow' in query['sql']
+        ]
+        self.assertEqual(len(follow_queries), 1)
+        self.assertIn('JOIN', follow_queries[0])
+        self.assertEqual(response.context['total'], 5)
+        self.assertContains(response, 'Имя4')
+        page = response.context['page_obj']
+        seen = [user.username for user in page]
+        while page.has_next():
+            page = self.client.get(
+                url, {'cursor': page.next_cursor}
+            ).context['page_obj']
+            seen += [user.username for user in page]
+        self.assertEqual(
+            seen, [f'fan{number}' for number in range(4, -1, -1)]
+        )
+
+    def test_following_page_and_api(self):
+        """Проверить страницу подписок и ответы API."""
+        response = self.client.get(reverse('posts:following', args=['star']))
+        self.assertEqual(
+            [user.username for user in response.context['page_obj']],
+            ['fan0'],
+        )
+        data = self.client.get(
+            reverse('posts:api_followers', args=['star']),
+            {'fields': 'username'},
+        ).json()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(
+            data['results'], [{'username': 'fan4'}, {'username': 'fan3'}]
+        )
+        data = self.client.get(
+            reverse('posts:api_following', args=['star'])
+        ).json()
+        self.assertEqual(data['results'], [{
+            'id': self.fans[0].id, 'username': 'fan0',
+            'first_name': 'Имя0', 'last_name': '',
+        }])
+        response = self.client.get(
+            reverse('posts:api_followers', args=['nobody'])
+        )
+        self.assertEqual(response.status_code, 404)
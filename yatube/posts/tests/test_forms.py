@@ -3,10 +3,12 @@ from http import HTTPStatus
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.tests.utils import TempStorageMixin
+
 from ..models import Group, Post, User
 
 
-class PostFormTests(TestCase):
+class PostFormTests(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.tests.utils import TempStorageMixin
+
+from ..importer import read_checkpoint
+from ..models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+def write_jsonl(path, records):
+    with open(path, 'w', encoding='utf-8') as target:
+        for record in records:
+            target.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+@override_settings(BATCH_SIZE=2)
+class ImportArchiveTest(TempStorageMixin, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        User.objects.create_user(username='existing')
+        write_jsonl(self.path('users.jsonl'), [
+            {'username': 'leo', 'first_name': 'Лев'},
+            {'username': 'anna'},
+            {'username': 'existing'},
+        ])
+        with open(self.path('groups.csv'), 'w', encoding='utf-8') as target:
+            target.write('slug,title,description\nbooks,Книги,О книгах\n')
+        write_jsonl(self.path('posts.jsonl'), [
+            {'id': 100 + number, 'author': 'leo', 'group': 'books',
+             'text': f'Пост {number}',
+             'pub_date': f'2001-01-0{number + 1}T10:00:00'}
+            for number in range(5)
+        ] + [{'id': 200, 'author': 'nobody', 'text': 'Без автора'}])
+        write_jsonl(self.path('comments.jsonl'), [
+            {'post': 100, 'author': 'anna', 'text': 'Отлично',
+             'created': '2001-02-01T10:00:00+03:00'},
+            {'post': 999, 'author': 'anna', 'text': 'К чужому посту'},
+        ])
+        write_jsonl(self.path('follows.jsonl'), [
+            {'user': 'anna', 'author': 'leo'},
+            {'user': 'anna', 'author': 'anna'},
+        ])
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def run_import(self, *args):
+        call_command(
+            'import_archive', self.directory, *args, stdout=StringIO()
+        )
+
+    def test_import_resolves_references_and_keeps_dates(self):
+        """Проверить импорт всех видов записей со ссылками и датами."""
+        self.run_import()
+        leo = User.objects.get(username='leo')
+        self.assertEqual(leo.first_name, 'Лев')
+        self.assertFalse(leo.has_usable_password())
+        self.assertEqual(User.objects.count(), 3)
+        group = Group.objects.get(slug='books')
+        self.assertEqual(
+            Post.objects.filter(author=leo, group=group).count(), 5
+        )
+        self.assertEqual(
+            Post.objects.get(id=100).pub_date.isoformat(),
+            '2001-01-01T10:00:00+00:00',
+        )
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post_id, 100)
+        self.assertEqual(comment.data_created.hour, 7)
+        self.assertTrue(Follow.objects.filter(
+            user__username='anna', author=leo
+        ).exists())
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(leo.counters.posts_count, 5)
+        self.assertEqual(Post.objects.get(id=100).comments_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='anna').count(), 5
+        )
+        self.assertEqual(read_checkpoint(self.path('posts.jsonl')), 6)
+
+    def test_resume_continues_after_checkpoint(self):
+        """Проверить, что --resume пропускает уже обработанные записи."""
+        self.run_import('--only', 'users', 'groups')
+        with open(self.path('posts.jsonl.done'), 'w') as checkpoint:
+            checkpoint.write('3')
+        self.run_import('--only', 'posts', '--resume')
+        self.assertEqual(
+            sorted(Post.objects.values_list('id', flat=True)), [103, 104]
+        )
+        self.run_import('--only', 'posts')
+        self.assertEqual(Post.objects.count(), 5)
+
+    def test_resume_fills_timelines_of_earlier_runs(self):
+        """Проверить ленты подписок, вставленных до обрыва импорта."""
+        self.run_import()
+        # Обрыв после вставки, но до пересчёта лент
+        TimelineEntry.objects.all().delete()
+        self.run_import('--resume')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='anna').count(), 5
+        )
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
+from core.tests.utils import TempStorageMixin
+
 from ..models import Group, Post
 
 User = get_user_model()
@@ -8,7 +10,7 @@ User = get_user_model()
 POST_TEXT_LIMIT: int = 15
 
 
-class PostModelTest(TestCase):
+class PostModelTest(TempStorageMixin, TestCase):
     """Тесты модели Post"""
     @classmethod
     def setUpClass(cls):
@@ -47,7 +49,7 @@ class PostModelTest(TestCase):
                 )
 
 
-class GroupModelTest(TestCase):
+class GroupModelTest(TempStorageMixin, TestCase):
     """Тесты модели Group"""
     @classmethod
     def setUpClass(cls):
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Group, Post, User
+
+
+class AnonymousPageCacheTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='etag')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='etag-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост для ETag', author=cls.user, group=cls.group
+        )
+
+        cls.PAGES = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.user.username]),
+            reverse('posts:post_detail', args=[cls.post.id]),
+        )
+        cls.POST_DETAIL = cls.PAGES[-1]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_conditional_get_returns_not_modified(self):
+        """Проверить 304 по If-None-Match и If-Modified-Since."""
+        for url in self.PAGES:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_cached_page_skips_templates(self):
+        """Проверить, что повторный запрос гостя не рендерит шаблон."""
+        first = self.guest_client.get(self.POST_DETAIL)
+        second = self.guest_client.get(self.POST_DETAIL)
+        self.assertEqual(first.content, second.content)
+        self.assertTemplateNotUsed(second, 'posts/post_detail.html')
+
+    def test_comment_changes_etag(self):
+        """Проверить, что новый комментарий сбрасывает кэш страницы."""
+        etag = self.guest_client.get(self.POST_DETAIL)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Свежий комментарий'
+        )
+        response = self.guest_client.get(
+            self.POST_DETAIL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_authorized_pages_not_cached(self):
+        """Проверить, что страницы пользователей не кэшируются."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(self.POST_DETAIL)
+        self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Follow, Group, Post, User
+
+# Сессия и пользователь авторизованного клиента
+AUTH_QUERIES: int = 2
+
+
+class QueryBudgetTest(TempStorageMixin, TestCase):
+    """Число запросов к БД не зависит от числа постов на странице."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='budget_author')
+        cls.reader = User.objects.create_user(username='budget_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Бюджетная группа',
+            slug='budget-slug',
+            description='Тестовое описание',
+        )
+        for _ in range(settings.NUM_OF_POSTS * 2):
+            cls.post = Post.objects.create(
+                text='Пост',
+                author=cls.author,
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.reader,
+                text='Комментарий',
+            )
+
+        cls.INDEX = reverse('posts:index')
+        cls.GROUP = reverse('posts:group_posts', args=[cls.group.slug])
+        cls.PROFILE = reverse('posts:profile', args=[cls.author.username])
+        cls.POST_DETAIL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.FOLLOW_INDEX = reverse('posts:follow_index')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_guest_query_budget(self):
+        """Проверить число запросов страниц для гостя."""
+        # Плюс один запрос id группы/автора для ключа кэша страницы
+        budgets = {
+            self.INDEX: 1,
+            self.INDEX + '?page=2': 2,
+            self.GROUP: 3,
+            self.PROFILE: 3,
+            self.POST_DETAIL: 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(budget):
+                    self.guest_client.get(url)
+
+    def test_authorized_query_budget(self):
+        """Проверить число запросов страниц для пользователя."""
+        # Профиль и лента подписок читают ещё и рекомендации, лента —
+        # и множество подписок, которое профиль уже берёт для кнопки
+        budgets = {
+            self.INDEX: 1,
+            self.GROUP: 2,
+            self.PROFILE: 4,
+            self.POST_DETAIL: 2,
+            self.FOLLOW_INDEX: 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(budget + AUTH_QUERIES):
+                    self.authorized_client.get(url)
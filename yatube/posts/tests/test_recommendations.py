@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Follow, Group, Post, Suggestion, User
+from ..recommendations import Adjacency, compute
+
+
+class RecommendationsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend', 'far', 'near', 'fan', 'other',
+                         'writer')
+        }
+        for user, author in (
+            ('reader', 'friend'),
+            ('friend', 'far'),
+            ('friend', 'near'),
+            ('fan', 'friend'),
+            ('fan', 'other'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        group = Group.objects.create(title='Группа', slug='group')
+        for name in ('reader', 'writer', 'writer'):
+            Post.objects.create(
+                author=cls.users[name], group=group, text='Текст'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.reader = self.users['reader']
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def suggested(self, user):
+        return {
+            suggestion.author.username: suggestion.get_reason_display()
+            for suggestion in Suggestion.objects.filter(user=user)
+        }
+
+    def test_adjacency(self):
+        """Проверить списки смежности в формате CSR."""
+        graph = Adjacency([(1, 5), (1, 7), (4, 2)])
+        self.assertEqual(list(graph[1]), [5, 7])
+        self.assertEqual(list(graph[4]), [2])
+        self.assertEqual(list(graph[3]), [])
+        self.assertEqual(list(graph[9]), [])
+
+    def test_compute_all_signals(self):
+        """Проверить рекомендации по всем трём сигналам."""
+        compute(full=True)
+        self.assertEqual(self.suggested(self.reader), {
+            'far': 'Читают ваши подписки',
+            'near': 'Читают ваши подписки',
+            'other': 'Читают вместе с вашими авторами',
+            'writer': 'Активен в ваших группах',
+        })
+
+    def test_incremental_recomputes_touched_users(self):
+        """Проверить, что без --full считаются только новые подписки."""
+        self.assertEqual(compute(full=True), 4)
+        Follow.objects.create(
+            user=self.users['near'], author=self.users['writer']
+        )
+        # Подписавшийся и подписчики на него
+        self.assertEqual(compute(), 2)
+        self.assertIn('writer', self.suggested(self.users['friend']))
+        self.assertEqual(compute(), 0)
+
+    def test_full_run_drops_users_without_signals(self):
+        """Проверить, что полный расчёт удаляет устаревшие рекомендации."""
+        fan = self.users['fan']
+        compute(full=True)
+        self.assertTrue(self.suggested(fan))
+        Follow.objects.filter(user=fan).delete()
+        compute()
+        self.assertTrue(self.suggested(fan))
+        compute(full=True)
+        self.assertEqual(self.suggested(fan), {})
+        self.assertTrue(self.suggested(self.reader))
+
+    def test_pages_show_suggestions(self):
+        """Проверить блок рекомендаций без уже прочитанных авторов."""
+        compute(full=True)
+        Follow.objects.create(user=self.reader, author=self.users['far'])
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=['friend']),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                names = [
+                    suggestion.author.username
+                    for suggestion in response.context['suggestions']
+                ]
+                self.assertNotIn('far', names)
+                self.assertIn('near', names)
+                self.assertContains(response, 'Кого почитать')
+
+    def test_command(self):
+        """Проверить команду compute_suggestions."""
+        out = StringIO()
+        call_command('compute_suggestions', '--full', stdout=out)
+        self.assertIn('Рекомендации пересчитаны для 4', out.getvalue())
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Group, Post, User
+from ..search import match_expression, search_posts
+from .test_views import FORGED_CURSORS
+
+
+class PostSearchTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.SEARCH = reverse('posts:search')
+
+    def found(self, query, **filters):
+        return list(search_posts(query).filter(**filters).order_by(
+            'rank', '-id'
+        ).values_list('text', flat=True))
+
+    def test_index_follows_changes(self):
+        """Проверить, что индекс следует за созданием, правкой, удалением."""
+        post = Post.objects.create(text='Ёжик в тумане', author=self.author)
+        self.assertEqual(self.found('ежик'), ['Ёжик в тумане'])
+        Post.objects.filter(id=post.id).update(text='Лошадь в тумане')
+        self.assertEqual(self.found('ежик'), [])
+        self.assertEqual(self.found('лошадь'), ['Лошадь в тумане'])
+        post.delete()
+        self.assertEqual(self.found('туман'), [])
+        Post.objects.bulk_create([
+            Post(text=f'Пакетный пост {number}', author=self.author)
+            for number in range(3)
+        ])
+        self.assertEqual(len(self.found('пакетный')), 3)
+
+    def test_query_syntax_is_not_executed(self):
+        """Проверить, что операторы FTS5 из запроса экранируются."""
+        self.assertEqual(
+            match_expression('NOT кот OR "пёс'), '"not" "кот" "or" "пес"*'
+        )
+        self.assertIsNone(match_expression('  ?!  '))
+        self.assertEqual(self.found('"*'), [])
+
+    def test_view_ranks_filters_and_paginates(self):
+        """Проверить ранжирование, фильтры и курсорные страницы поиска."""
+        Post.objects.create(text='кот', author=self.other)
+        Post.objects.create(
+            text='кот кот кот', author=self.author, group=self.group
+        )
+        for number in range(settings.NUM_OF_POSTS):
+            Post.objects.create(
+                text=f'кот и длинный текст номер {number} про всё подряд',
+                author=self.author,
+            )
+        client = Client()
+        response = client.get(self.SEARCH, {'q': 'кот'})
+        first = response.context['page_obj']
+        self.assertEqual(len(first), settings.NUM_OF_POSTS)
+        self.assertEqual(first[0].text, 'кот кот кот')
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+        second = client.get(
+            self.SEARCH, {'q': 'кот', 'cursor': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), 2)
+        self.assertFalse(
+            {post.id for post in first} & {post.id for post in second}
+        )
+        for cursor in FORGED_CURSORS:
+            with self.subTest(cursor=cursor):
+                page_obj = client.get(
+                    self.SEARCH, {'q': 'кот', 'cursor': cursor}
+                ).context['page_obj']
+                self.assertEqual(list(page_obj), list(first))
+        response = client.get(self.SEARCH, {'q': 'кот', 'group': 'group'})
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['кот кот кот'],
+        )
+        response = client.get(self.SEARCH, {'q': 'кот', 'author': 'other'})
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']], ['кот']
+        )
+
+    def test_admin_search_uses_index(self):
+        """Проверить, что поиск в админке идёт по индексу, а не LIKE."""
+        Post.objects.create(text='Редкое слово', author=self.author)
+        Post.objects.create(text='Обычный текст', author=self.author)
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'редкое'}
+            )
+        self.assertEqual(response.context['cl'].result_count, 1)
+        self.assertFalse(any(
+            'LIKE' in query['sql'] and 'posts_post' in query['sql']
+            for query in queries.captured_queries
+        ))
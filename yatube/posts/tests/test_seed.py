@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Comment, Follow, Post, TimelineEntry, User
+from ..seed import DEFAULT_END, Dataset
+
+
+class SeedDataTest(TempStorageMixin, TestCase):
+    def seed(self, *args):
+        call_command(
+            'seed_data', '--posts', '300', '--users', '30', *args,
+            stdout=StringIO(),
+        )
+
+    def test_dataset_is_reproducible(self):
+        """Проверить, что одно зерно даёт одни и те же записи."""
+        first, second, other = (
+            Dataset(posts=200, seed=seed) for seed in (1, 1, 2)
+        )
+        for kind in ('users', 'groups', 'posts', 'comments', 'follows'):
+            with self.subTest(kind=kind):
+                self.assertEqual(
+                    list(getattr(first, kind)()),
+                    list(getattr(second, kind)()),
+                )
+        self.assertNotEqual(list(first.posts()), list(other.posts()))
+
+    def test_command_loads_skewed_dataset(self):
+        """Проверить загрузку набора с перекосом и производными данными."""
+        self.seed('--seed', '3')
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertTrue(Comment.objects.exists())
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        top = User.objects.order_by('-counters__posts_count').first()
+        self.assertGreater(top.counters.posts_count, 300 / 30 * 3)
+        follow = Follow.objects.filter(author=top).first()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user_id=follow.user_id, author=top
+        ).exists())
+        latest = Post.objects.latest('pub_date').pub_date
+        self.assertLessEqual(latest, DEFAULT_END)
+        self.seed('--seed', '3', '--end', '2030-01-01')
+        self.assertEqual(Post.objects.count(), 600)
+        latest = Post.objects.latest('pub_date').pub_date
+        self.assertEqual(latest.date().isoformat(), '2029-12-31')
+        self.assertEqual(User.objects.count(), 30)
@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from core.tests.utils import TempStorageMixin
+
+from .. import thumbnails, variants
+from ..models import Post, User
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded_gif(name='small.gif'):
+    return SimpleUploadedFile(
+        name=name, content=SMALL_GIF, content_type='image/gif'
+    )
+
+
+class ThumbnailsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            image=uploaded_gif(),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_templates_show_placeholder_until_thumbnail_ready(self):
+        """Проверить, что шаблоны не обрабатывают картинки сами."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        )
+        with mock.patch.object(
+            default.backend, 'get_thumbnail'
+        ) as get_thumbnail:
+            for url in urls:
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertContains(response, thumbnails.PLACEHOLDER)
+        get_thumbnail.assert_not_called()
+
+    def test_ready_thumbnail_is_rendered(self):
+        """Проверить, что готовая миниатюра заменяет заглушку."""
+        thumbnail = thumbnails.thumbnail_file(self.post.image, 'card')
+        thumbnail.set_size((400, 400))
+        default.kvstore.set(thumbnail)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        self.assertContains(response, thumbnail.url)
+        self.assertNotContains(response, thumbnails.PLACEHOLDER)
+
+    def test_page_thumbnails_are_read_in_one_batch(self):
+        """Проверить, что миниатюры страницы читаются одним запросом."""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Ещё пост {number}',
+                author=self.user,
+                image=uploaded_gif(f'more{number}.gif'),
+            )
+        ready = thumbnails.thumbnail_file(self.post.image, 'card')
+        ready.set_size((400, 400))
+        default.kvstore.set(ready)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        kvstore_queries = [
+            query for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+        self.assertEqual(len(kvstore_queries), 1)
+        self.assertContains(response, ready.url)
+        self.assertContains(response, thumbnails.PLACEHOLDER, count=3)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('posts:index') + '?page=1')
+        self.assertFalse(any(
+            'thumbnail_kvstore' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_upload_schedules_generation(self):
+        """Проверить, что загрузка картинки ставит обработку в очередь."""
+        with mock.patch.object(thumbnails, 'run_in_background') as run:
+            self.client.post(
+                reverse('posts:create'),
+                {'text': 'Новый пост', 'image': uploaded_gif('new.gif')},
+            )
+            post = Post.objects.latest('id')
+            run.assert_has_calls([
+                mock.call(thumbnails.generate, post.id),
+                mock.call(variants.generate, post.id),
+            ])
+            run.reset_mock()
+            self.client.post(
+                reverse('posts:edit', args=[post.id]),
+                {'text': 'Только текст'},
+            )
+            run.assert_not_called()
@@ -0,0 +1,84 @@
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.tests.utils import TempStorageMixin
+
+from ..models import Post, User
+from ..uploads import BoundedUploadHandler
+
+
+def uploaded_jpeg(size, name='photo.jpg'):
+    buffer = BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(POST_IMAGE_MAX_SIDE=400, POST_IMAGE_MAX_BYTES=50_000)
+class PostImageUploadTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.CREATE = reverse('posts:create')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return self.client.post(
+            self.CREATE, {'text': 'Пост с фото', 'image': image}
+        )
+
+    def test_large_image_is_downscaled(self):
+        """Проверить, что большая картинка хранится уменьшенной."""
+        self.create(uploaded_jpeg((1200, 600), name='photo.png'))
+        post = Post.objects.get()
+        self.assertRegex(post.image.name, r'^posts/photo.*\.jpg$')
+        self.assertLessEqual(post.image.size, 50_000)
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (400, 200))
+
+    def test_small_image_is_kept(self):
+        """Проверить, что небольшая картинка сохраняется как есть."""
+        image = uploaded_jpeg((100, 50))
+        content = image.read()
+        image.seek(0)
+        self.create(image)
+        post = Post.objects.get()
+        self.assertEqual(post.image.read(), content)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=10_000)
+    def test_too_many_pixels_rejected(self):
+        """Проверить отказ для картинки со слишком большим разрешением."""
+        response = self.create(uploaded_jpeg((200, 200)))
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_many_pixels')
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_BYTES=1024)
+    def test_oversize_upload_rejected(self):
+        """Проверить отказ для файла больше предела загрузки."""
+        response = self.create(uploaded_jpeg((300, 300)))
+        self.assertTrue(
+            response.context['form'].has_error('image', 'file_too_large')
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_BYTES=1024)
+    def test_oversize_upload_stops_reading(self):
+        """Проверить, что чтение обрывается на первой части сверх предела."""
+        request = RequestFactory().post('/')
+        handler = BoundedUploadHandler(request)
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', None)
+        handler.receive_data_chunk(b'x' * 1000, 0)
+        with self.assertRaises(StopUpload) as raised:
+            handler.receive_data_chunk(b'x' * 1000, 1000)
+        self.assertTrue(raised.exception.connection_reset)
+        self.assertEqual(request.oversize_uploads, [('image', 'photo.jpg')])
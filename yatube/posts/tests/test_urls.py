@@ -3,12 +3,14 @@ from http import HTTPStatus
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 
+from core.tests.utils import TempStorageMixin
+
 from ..models import Group, Post
 
 User = get_user_model()
 
 
-class PostURLTests(TestCase):
+class PostURLTests(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -131,7 +133,7 @@ class PostURLTests(TestCase):
                 self.assertTemplateUsed(response, template)
 
 
-class ViewTestClass(TestCase):
+class ViewTestClass(TempStorageMixin, TestCase):
     def test_error_page(self):
         response = self.client.get('/Justic/')
         self.assertEqual(response.status_code, 404)
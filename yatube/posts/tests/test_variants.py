@@ -0,0 +1,99 @@
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.tests.utils import TempStorageMixin
+
+from .. import variants
+from ..models import Post, User
+
+
+def uploaded_jpeg(size, name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(POST_IMAGE_WIDTHS=(320, 640, 960))
+class ImageVariantsTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(
+            text='Пост с фото',
+            author=self.user,
+            image=uploaded_jpeg((800, 400)),
+        )
+
+    def test_widths_do_not_upscale(self):
+        """Проверить набор ширин для разных оригиналов."""
+        cases = {
+            200: [200],
+            800: [320, 640, 800],
+            2000: [320, 640, 960],
+        }
+        for original, expected in cases.items():
+            with self.subTest(original=original):
+                self.assertEqual(variants.widths_for(original), expected)
+
+    def test_variant_names_keep_source_extension(self):
+        """Проверить, что у разных исходников разные имена вариантов."""
+        for image_name, expected in (
+            ('posts/photo.jpg', 'posts/variants/photo.jpg_640w.webp'),
+            ('posts/photo.png', 'posts/variants/photo.png_640w.webp'),
+            ('photo.jpg', 'variants/photo.jpg_640w.webp'),
+        ):
+            with self.subTest(image_name=image_name):
+                self.assertEqual(
+                    variants.variant_name(image_name, 640, 'webp'), expected
+                )
+
+    def test_generate_stores_webp_and_jpeg(self):
+        """Проверить, что варианты создаются во всех форматах."""
+        variants.generate(self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_widths, '320,640,800')
+        for width in (320, 640, 800):
+            for extension, image_format in (('webp', 'WEBP'),
+                                            ('jpg', 'JPEG')):
+                name = variants.variant_name(
+                    self.post.image.name, width, extension
+                )
+                with default_storage.open(name) as stored:
+                    image = Image.open(stored)
+                    self.assertEqual(image.format, image_format)
+                    self.assertEqual(image.width, width)
+
+    def test_template_uses_srcset(self):
+        """Проверить разметку картинки с вариантами и без них."""
+        url = reverse('posts:post_detail', args=[self.post.id])
+        response = self.client.get(url)
+        self.assertNotContains(response, 'srcset')
+        self.assertContains(response, 'loading="lazy"')
+        variants.generate(self.post.id)
+        response = self.client.get(url)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '_640w.webp 640w')
+        self.assertContains(response, '_320w.jpg 320w')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_new_image_resets_variants(self):
+        """Проверить, что замена картинки сбрасывает старые варианты."""
+        variants.generate(self.post.id)
+        self.client.post(
+            reverse('posts:edit', args=[self.post.id]),
+            {'text': 'Новое фото', 'image': uploaded_jpeg((100, 100))},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_widths, '')
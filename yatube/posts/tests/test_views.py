@@ -1,15 +1,36 @@
+import base64
+
 from django import forms
 
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
+from core.tests.utils import TempStorageMixin
 
 from ..models import Group, Post, User
+from ..paginators import ELLIPSIS, CachedCountPaginator, count_key
+
+# Курсоры с подделанными значениями ключа
+FORGED_CURSORS = [
+    base64.urlsafe_b64encode(payload.encode()).decode()
+    for payload in (
+        '{"v":["2020-01-01T00:00:00+00:00","abc"],"r":0}',
+        '{"v":[{},1],"r":0}',
+        '{"v":[[1],1]}',
+        '{"v":[null,null]}',
+        '{"v":[1],"r":0}',
+        '{"v":["2020-01-01T00:00:00+00:00",99999999999999999999999],"r":0}',
+    )
+]
 
 
-class PostPagesTests(TestCase):
+class PostPagesTests(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -108,7 +129,7 @@ class PostPagesTests(TestCase):
         self.check_post_info(response.context['post'])
 
 
-class PaginatorTest(TestCase):
+class PaginatorTest(TempStorageMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -170,3 +191,142 @@ class PaginatorTest(TestCase):
                     total_posts_on_page,
                     expected_number_of_posts
                 )
+
+
+class CursorPaginatorTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.guest_client = Client()
+        cls.user = User.objects.create(username='cursor')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user)
+            for i in range(settings.NUMBER_OF_TEST_POSTS)
+        )
+        cls.INDEX = reverse('posts:index')
+
+    def setUp(self):
+        # Гостевые страницы кэшируются целиком, а тестам нужен контекст
+        cache.clear()
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Проверить, что курсорные страницы обходят ленту без пропусков."""
+        seen = []
+        response = self.guest_client.get(self.INDEX)
+        while True:
+            page_obj = response.context['page_obj']
+            self.assertTrue(page_obj.is_cursor)
+            seen.extend(post.id for post in page_obj)
+            if not page_obj.has_next():
+                break
+            response = self.guest_client.get(
+                self.INDEX, {'cursor': page_obj.next_cursor}
+            )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        """Проверить возврат на предыдущую страницу по курсору."""
+        first = self.guest_client.get(self.INDEX).context['page_obj']
+        second = self.guest_client.get(
+            self.INDEX, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        self.assertTrue(second.has_previous())
+        back = self.guest_client.get(
+            self.INDEX, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertTrue(back.has_next())
+
+    def test_stale_cursor_gives_empty_page(self):
+        """Проверить курсор, после которого записи удалены."""
+        first = self.guest_client.get(self.INDEX).context['page_obj']
+        cursor = first.next_cursor
+        Post.objects.exclude(id__in=[post.id for post in first]).delete()
+        cache.clear()
+        for reverse_cursor in (False, True):
+            with self.subTest(reverse=reverse_cursor):
+                if reverse_cursor:
+                    cursor = first.paginator.cursor_for(
+                        first.rows[-1], reverse=True
+                    )
+                    Post.objects.all().delete()
+                    cache.clear()
+                response = self.guest_client.get(
+                    self.INDEX, {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                page_obj = response.context['page_obj']
+                self.assertEqual(list(page_obj), [])
+                self.assertIsNone(page_obj.next_cursor)
+                self.assertIsNone(page_obj.previous_cursor)
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        """Проверить, что испорченный курсор открывает первую страницу."""
+        first = self.guest_client.get(self.INDEX).context['page_obj']
+        cursors = ['мусор', 'eyJ2IjpbIngiLDFdLCJyIjowfQ', *FORGED_CURSORS]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.guest_client.get(
+                    self.INDEX, {'cursor': cursor}
+                )
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first)
+                )
+
+
+class CachedCountPaginatorTest(TempStorageMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='counter')
+        cls.group = Group.objects.create(
+            title='Счётная группа',
+            slug='count-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            Post(text='Пост', author=cls.user, group=cls.group)
+            for _ in range(settings.NUMBER_OF_TEST_POSTS)
+        )
+        cls.GROUP = reverse('posts:group_posts', args=[cls.group.slug])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached_and_updated_incrementally(self):
+        """Проверить, что число постов берётся из кэша и меняется по месту."""
+        key = count_key('group', self.group.id)
+        self.client.get(self.GROUP, {'page': 1})
+        self.assertEqual(cache.get(key), settings.NUMBER_OF_TEST_POSTS)
+        post = Post.objects.create(
+            text='Ещё пост', author=self.user, group=self.group
+        )
+        self.assertEqual(cache.get(key), settings.NUMBER_OF_TEST_POSTS + 1)
+        post.group = None
+        post.save()
+        self.assertEqual(cache.get(key), settings.NUMBER_OF_TEST_POSTS)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.GROUP, {'page': 2})
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+
+    def test_elided_page_range(self):
+        """Проверить, что номера страниц выводятся окном с «…»."""
+        paginator = CachedCountPaginator(list(range(1000)), 10)
+        self.assertEqual(
+            list(paginator.elided_page_range(50)),
+            [1, ELLIPSIS, 48, 49, 50, 51, 52, ELLIPSIS, 100],
+        )
+        self.assertEqual(
+            list(paginator.elided_page_range(1)),
+            [1, 2, 3, ELLIPSIS, 100],
+        )
+        response = self.client.get(self.GROUP, {'page': 5})
+        self.assertContains(response, '…')
+        self.assertNotContains(response, '?page=8"')
@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.templatetags.static import static
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE
+from sorl.thumbnail.kvstores.cached_db_kvstore import KVStore as CachedDBStore
+from sorl.thumbnail.models import KVStore
+
+from core.background import run_in_background
+
+from . import cache_versions, variants
+from .models import Post
+
+PLACEHOLDER = 'img/placeholder.svg'
+
+
+class Placeholder:
+    """Заглушка размера миниатюры, пока та не готова."""
+    is_placeholder = True
+
+    def __init__(self, geometry):
+        width, _, height = geometry.partition('x')
+        self.width = int(width)
+        self.height = int(height or width)
+        self.url = static(PLACEHOLDER)
+
+
+def _options(source, options):
+    # Те же умолчания, что добавляет sorl в get_thumbnail: иначе имя
+    # файла миниатюры не совпадёт с созданным
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, alias):
+    """Файл миниатюры из POST_THUMBNAILS, без обращения к хранилищу."""
+    geometry, options = settings.POST_THUMBNAILS[alias]
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, _options(source, options)
+    )
+    return ImageFile(name, default.storage)
+
+
+def lookup(image, alias):
+    """
+    Готовая миниатюра из хранилища ключей sorl или заглушка.
+    Картинку не открывает и не обрабатывает.
+    """
+    cached = default.kvstore.get(thumbnail_file(image, alias))
+    if cached is None:
+        return Placeholder(settings.POST_THUMBNAILS[alias][0])
+    return cached
+
+
+def _load_many(files):
+    # Как KVStore._get_raw из sorl, но один get_many к кэшу и один
+    # запрос к таблице на все промахи; отсутствие тоже кэшируется
+    kvstore = default.kvstore
+    if not isinstance(kvstore, CachedDBStore):
+        return {file.key: kvstore.get(file) for file in files}
+    keys = {add_prefix(file.key): file.key for file in files}
+    values = kvstore.cache.get_many(list(keys))
+    missing = [key for key in keys if key not in values]
+    if missing:
+        stored = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        for key in missing:
+            values[key] = stored.get(key, EMPTY_VALUE)
+        kvstore.cache.set_many(
+            {key: values[key] for key in missing},
+            sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+        )
+    return {
+        keys[key]: deserialize_image_file(value)
+        for key, value in values.items() if value != EMPTY_VALUE
+    }
+
+
+class ThumbnailBatch:
+    """
+    Миниатюры страницы постов: при первом обращении к размеру
+    читает его для всех постов страницы разом. Ничего не делает,
+    если страница взята из кэша фрагментов.
+    """
+
+    def __init__(self, posts):
+        self._posts = posts
+        self._resolved = {}
+
+    def _resolve(self, alias):
+        files = {
+            post.id: thumbnail_file(post.image, alias)
+            for post in self._posts if post.image
+        }
+        found = _load_many(files.values())
+        return {
+            post_id: found[file.key]
+            for post_id, file in files.items() if found.get(file.key)
+        }
+
+    def get(self, post, alias):
+        if alias not in self._resolved:
+            self._resolved[alias] = self._resolve(alias)
+        thumbnail = self._resolved[alias].get(post.id)
+        if thumbnail is None:
+            return Placeholder(settings.POST_THUMBNAILS[alias][0])
+        return thumbnail
+
+
+def generate(post_id):
+    """
+    Создаёт все миниатюры картинки поста и сбрасывает фрагменты,
+    закэшированные с заглушкой.
+    """
+    post = Post.objects.filter(id=post_id).values(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post['image']:
+        return
+    for geometry, options in settings.POST_THUMBNAILS.values():
+        get_thumbnail(post['image'], geometry, **options)
+    cache_versions.bump_post(post_id, post['author_id'], post['group_id'])
+
+
+def schedule(post):
+    """Ставит миниатюры и варианты картинки поста в фоновый пул."""
+    if post.image:
+        run_in_background(generate, post.id)
+        run_in_background(variants.generate, post.id)
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.db import connection
+
+from .models import Follow, Post, TimelineEntry
+
+
+def _is_following(user_id, author_id):
+    return Follow.objects.filter(user_id=user_id, author_id=author_id).exists()
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=settings.BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_post(post_id):
+    """Раскладывает новый пост по лентам подписчиков автора пачками."""
+    post = Post.objects.filter(id=post_id).values(
+        'id', 'author_id', 'pub_date'
+    ).first()
+    if post is None:
+        return
+    followers = Follow.objects.filter(
+        author_id=post['author_id']
+    ).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator(chunk_size=settings.BATCH_SIZE):
+        batch.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post['id'],
+            author_id=post['author_id'],
+            pub_date=post['pub_date'],
+        ))
+        if len(batch) >= settings.BATCH_SIZE:
+            _insert(batch)
+            batch = []
+    if batch:
+        _insert(batch)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if not _is_following(user_id, author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id'
+    ).values_list('id', 'pub_date')[:settings.TIMELINE_BACKFILL]
+    _insert([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts
+    ])
+
+
+def rebuild():
+    """
+    Заполняет ленты по всем подпискам одним INSERT ... SELECT: каждой
+    паре достаются последние TIMELINE_BACKFILL постов автора, как в
+    backfill. Для массовой загрузки, где backfill по парам — это
+    миллионы запросов.
+    """
+    ops = connection.ops
+    with connection.cursor() as cursor:
+        cursor.execute(
+            '%s %s (user_id, post_id, author_id, pub_date) '
+            'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            'FROM %s follow JOIN ('
+            '  SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            '    PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            '  ) AS position FROM %s'
+            ') post ON post.author_id = follow.author_id '
+            'WHERE post.position <= %%s%s' % (
+                ops.insert_statement(ignore_conflicts=True),
+                ops.quote_name(TimelineEntry._meta.db_table),
+                ops.quote_name(Follow._meta.db_table),
+                ops.quote_name(Post._meta.db_table),
+                ops.ignore_conflicts_suffix_sql(ignore_conflicts=True),
+            ),
+            [settings.TIMELINE_BACKFILL],
+        )
+
+
+def prune(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    if _is_following(user_id, author_id):
+        return
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
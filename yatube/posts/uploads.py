@@ -0,0 +1,118 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile, SimpleUploadedFile,
+)
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler,
+)
+from PIL import Image, ImageOps
+
+# Качество JPEG по убыванию, пока файл не уложится в POST_IMAGE_MAX_BYTES
+QUALITIES = (85, 75, 65, 55)
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузку во временный файл по частям, не держа её в памяти.
+    На первой части сверх POST_IMAGE_MAX_UPLOAD_BYTES чтение запроса
+    прекращается: файл отбрасывается, имя поля запоминается в
+    request.oversize_uploads, а upload_files подставит вместо него
+    пометку, по которой форма вернёт ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_UPLOAD_BYTES:
+            if not hasattr(self.request, 'oversize_uploads'):
+                self.request.oversize_uploads = []
+            self.request.oversize_uploads.append(
+                (self.field_name, self.file_name)
+            )
+            # Остаток тела не дочитываем: предел ограничивает и ввод
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def upload_files(request):
+    """
+    request.FILES для формы, где файлы, отброшенные BoundedUploadHandler,
+    заменены пустыми пометками oversize; без файлов — None.
+    """
+    files = request.FILES
+    oversize = getattr(request, 'oversize_uploads', ())
+    if oversize:
+        files = files.copy()
+        for field_name, file_name in oversize:
+            placeholder = SimpleUploadedFile(file_name, b'')
+            placeholder.oversize = True
+            files[field_name] = placeholder
+    return files or None
+
+
+def _encode(image):
+    for quality in QUALITIES:
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        if buffer.tell() <= settings.POST_IMAGE_MAX_BYTES:
+            break
+    return buffer
+
+
+def check_image(uploaded):
+    """
+    Отклоняет загрузку до полного разбора картинки: обрезанную по
+    POST_IMAGE_MAX_UPLOAD_BYTES и слишком большую по числу пикселей.
+    Размеры читаются из заголовка, без декодирования.
+    """
+    if getattr(uploaded, 'oversize', False):
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            params={'limit': settings.POST_IMAGE_MAX_UPLOAD_BYTES >> 20},
+            code='file_too_large',
+        )
+    try:
+        with Image.open(uploaded) as image:
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        # Битые файлы отклонит проверка самого ImageField
+        return
+    finally:
+        uploaded.seek(0)
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)s мегапикселей.',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+            code='too_many_pixels',
+        )
+
+
+def shrink_image(uploaded):
+    """
+    Картинки больше POST_IMAGE_MAX_SIDE по стороне или
+    POST_IMAGE_MAX_BYTES по весу уменьшает и перекодирует в JPEG,
+    остальные возвращает как есть.
+    """
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    uploaded.seek(0)
+    image = Image.open(uploaded)
+    if (max(image.size) <= max_side
+            and uploaded.size <= settings.POST_IMAGE_MAX_BYTES):
+        uploaded.seek(0)
+        return uploaded
+    # JPEG умеет декодироваться сразу в уменьшенном масштабе
+    image.draft('RGB', (max_side, max_side))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    image.thumbnail((max_side, max_side), Image.LANCZOS)
+    buffer = _encode(image)
+    name = os.path.splitext(os.path.basename(uploaded.name))[0] + '.jpg'
+    return InMemoryUploadedFile(
+        buffer, 'image', name, 'image/jpeg', buffer.tell(), None
+    )
@@ -0,0 +1,99 @@
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from . import cache_versions
+from .models import Post
+
+# Формат варианта: (расширение, формат Pillow, параметры сохранения)
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+def variant_name(image_name, width, extension):
+    """posts/photo.jpg -> posts/variants/photo.jpg_640w.webp"""
+    # Имя исходника целиком, с расширением: иначе варианты photo.jpg
+    # и photo.png совпали бы и перезаписали друг друга
+    directory, filename = posixpath.split(image_name)
+    return posixpath.join(
+        directory, 'variants', f'{filename}_{width}w.{extension}'
+    )
+
+
+def widths_for(original_width):
+    # Без увеличения: ширины меньше оригинала и сам оригинал,
+    # если он не шире самого крупного варианта
+    widths = [
+        width for width in settings.POST_IMAGE_WIDTHS
+        if width < original_width
+    ]
+    largest = min(original_width, settings.POST_IMAGE_WIDTHS[-1])
+    if largest not in widths:
+        widths.append(largest)
+    return widths
+
+
+def parse_widths(value):
+    # Посторонние значения поля (фикстуры, ручные правки) не ломают
+    # вывод: считаем, что вариантов нет
+    return [int(width) for width in value.split(',') if width.isdigit()]
+
+
+def srcset(post, extension):
+    """Строка srcset готовых вариантов одного формата."""
+    return ', '.join(
+        '%s %dw' % (
+            default_storage.url(
+                variant_name(post.image.name, width, extension)
+            ),
+            width,
+        )
+        for width in parse_widths(post.image_widths)
+    )
+
+
+def fallback_url(post, width):
+    """JPEG-вариант для браузеров без srcset: не уже слота width."""
+    widths = parse_widths(post.image_widths)
+    chosen = next((w for w in widths if w >= width), widths[-1])
+    return default_storage.url(variant_name(post.image.name, chosen, 'jpg'))
+
+
+def _save(name, image, image_format, options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    # Имя должно совпасть с ожидаемым шаблоном: старый файл убираем
+    default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def generate(post_id):
+    """Создаёт варианты картинки поста всех ширин и форматов."""
+    post = Post.objects.filter(id=post_id).values(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post['image']:
+        return
+    with default_storage.open(post['image']) as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original = original.convert('RGB')
+    widths = widths_for(original.width)
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+        for extension, image_format, options in FORMATS:
+            _save(
+                variant_name(post['image'], width, extension),
+                resized, image_format, options,
+            )
+    # Картинку могли заменить, пока шла обработка
+    Post.objects.filter(id=post_id, image=post['image']).update(
+        image_widths=','.join(map(str, widths))
+    )
+    cache_versions.bump_post(post_id, post['author_id'], post['group_id'])
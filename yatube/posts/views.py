@@ -1,69 +1,286 @@
+from operator import attrgetter
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 
-from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
+from . import follow_graph, thumbnails, uploads
+from .cache_versions import fragment_cache
+from .export import export_posts
+from .forms import CommentForm, PostForm, SearchForm
+from .page_cache import cache_anonymous_page
+from .models import (Comment, Follow, Group, Post, Suggestion, TimelineEntry,
+                     User, UserCounter)
+from .paginators import (COMMENT_ORDERING, FEED_ORDERING, FOLLOW_ORDERING,
+                         TIMELINE_ORDERING, CachedCountPaginator,
+                         CursorPaginator, count_key)
+from .search import SEARCH_ORDERING, search_posts
 
 
-def addition_paginator(queryset, request):
-    # Внедрение паджинатора
-    paginator = Paginator(queryset, settings.NUM_OF_POSTS)
+def addition_paginator(queryset, request, count_parts=None,
+                       cursor_paginator=None):
+    # Внедрение паджинатора: ?page= оставлен для старых ссылок,
+    # остальные запросы листаются курсором по (pub_date, id)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return {'page_obj': page_obj}
+    if page_number is not None:
+        paginator = CachedCountPaginator(
+            queryset.order_by(*FEED_ORDERING),
+            settings.NUM_OF_POSTS,
+            count_key=count_key(*count_parts) if count_parts else None,
+        )
+        page_obj = paginator.get_page(page_number)
+    else:
+        paginator = cursor_paginator or CursorPaginator(
+            queryset, settings.NUM_OF_POSTS
+        )
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+    return {
+        'page_obj': page_obj,
+        'thumbnails': thumbnails.ThumbnailBatch(page_obj.object_list),
+    }
+
+
+def _group_scopes(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    return (f'group:{group_id}', 'users')
+
 
+def _profile_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    return (f'author:{author_id}', f'follows:{author_id}', 'groups')
 
+
+def _post_scopes(post_id):
+    author_id = Post.objects.filter(id=post_id).values_list(
+        'author_id', flat=True
+    ).first()
+    return (f'post:{post_id}', f'author:{author_id}', 'groups', 'users')
+
+
+@cache_anonymous_page(lambda: ('posts', 'groups', 'users'))
 def index(request):
     # Главная страница
-    post_list = Post.objects.all()
+    post_list = Post.objects.select_related('author', 'group')
     template = 'posts/index.html'
-    context_title = addition_paginator(post_list, request)
+    context_title = addition_paginator(post_list, request, ('all',))
+    context_title.update(fragment_cache('posts', 'groups', 'users'))
     return render(request, template, context_title)
 
 
+@cache_anonymous_page(_group_scopes)
 def group_posts(request, slug):
     # Групповая страница
     group = get_object_or_404(Group, slug=slug)
-    groups = group.posts.all()
+    groups = group.posts.select_related('author', 'group')
     template = 'posts/group_list.html'
     context = {
         'group': group,
         'posts': groups,
     }
-    context.update(addition_paginator(groups, request))
+    context.update(
+        addition_paginator(groups, request, ('group', group.id))
+    )
+    context.update(fragment_cache(f'group:{group.id}', 'users'))
     return render(request, template, context)
 
 
+def _suggestions(user):
+    # Готовые рекомендации одним запросом по индексу (user, -score);
+    # авторы, на которых подписались после расчёта, отсекаются по
+    # кэшированному множеству подписок
+    if not user.is_authenticated:
+        return []
+    suggestions = Suggestion.objects.filter(user=user).select_related(
+        'author'
+    ).order_by('-score')[:settings.SUGGESTIONS_PER_USER]
+    following = follow_graph.following_ids(user.id)
+    return [
+        suggestion for suggestion in suggestions
+        if suggestion.author_id not in following
+    ][:settings.SUGGESTIONS_SHOWN]
+
+
+@cache_anonymous_page(_profile_scopes)
 def profile(request, username):
     # Страница профиля
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    following = request.user.is_authenticated
-    if following:
-        following = author.following.filter(user=request.user).exists()
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    posts = author.posts.select_related('author', 'group')
+    following = request.user.is_authenticated and follow_graph.is_following(
+        request.user.id, author.id
+    )
     template = 'posts/profile.html'
     context = {
         'author': author,
-        'following': following
+        'following': following,
+        'suggestions': _suggestions(request.user),
     }
-    context.update(addition_paginator(posts, request))
+    context.update(
+        addition_paginator(posts, request, ('author', author.id))
+    )
+    context.update(fragment_cache(f'author:{author.id}', 'groups'))
     return render(request, template, context)
 
 
-def post_detail(request, post_id):
-    # Подробная информация о посте
-    post = get_object_or_404(Post, id=post_id)
-    form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+def _follow_list_scopes(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    return (f'follows:{author_id}', 'users')
+
+
+def _follow_list(request, username, relation):
+    # Подписчики (relation='followers') или подписки пользователя:
+    # страница — один запрос с JOIN пользователей по индексу
+    # (автор/подписчик, id), итог — из денормализованных счётчиков
+    profile_user = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    if relation == 'followers':
+        other = 'user'
+        follows = Follow.objects.filter(author=profile_user)
+    else:
+        other = 'author'
+        follows = Follow.objects.filter(user=profile_user)
+    follows = follows.select_related(other).only(
+        f'{other}__username', f'{other}__first_name', f'{other}__last_name'
+    ).order_by(*FOLLOW_ORDERING)
+    paginator = CursorPaginator(
+        follows, settings.NUM_OF_FOLLOWS,
+        ordering=FOLLOW_ORDERING, unwrap=attrgetter(other),
+    )
+    counters = getattr(profile_user, 'counters', None)
+    context = {
+        'author': profile_user,
+        'relation': relation,
+        'total': getattr(counters, f'{relation}_count', 0),
+        'page_obj': paginator.get_page(request.GET.get('cursor')),
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+@cache_anonymous_page(_follow_list_scopes)
+def followers(request, username):
+    # Кто подписан на пользователя
+    return _follow_list(request, username, 'followers')
+
+
+@cache_anonymous_page(_follow_list_scopes)
+def following(request, username):
+    # На кого подписан пользователь
+    return _follow_list(request, username, 'following')
+
+
+def _comments_page(post_id, cursor=None):
+    # Страница комментариев — один запрос с JOIN автора; курсор по
+    # (data_created, id) идёт по индексу comment_post_feed_idx
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    ).only('post_id', 'text', 'data_created', 'author__username')
+    paginator = CursorPaginator(
+        comments, settings.NUM_OF_COMMENTS, ordering=COMMENT_ORDERING
+    )
+    return paginator.get_page(cursor)
+
+
+def _post_detail(request, post, form):
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': _comments_page(post.id, request.GET.get('cursor')),
+        'thumbnails': thumbnails.ThumbnailBatch([post]),
     }
-    template = 'posts/post_detail.html'
-    return render(request, template, context)
+    return render(request, 'posts/post_detail.html', context)
+
+
+@cache_anonymous_page(_post_scopes)
+def post_detail(request, post_id):
+    # Подробная информация о посте
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'),
+        id=post_id
+    )
+    return _post_detail(request, post, CommentForm())
+
+
+@cache_anonymous_page(_post_scopes)
+def post_comments(request, post_id):
+    # Следующая страница комментариев фрагментом HTML для post_detail
+    if not Post.objects.filter(id=post_id).exists():
+        raise Http404
+    context = {
+        'post_id': post_id,
+        'comments': _comments_page(post_id, request.GET.get('cursor')),
+    }
+    return render(request, 'includes/comments.html', context)
+
+
+def _ndjson_response(lines, filename):
+    # Строки отдаются по мере чтения из базы, ответ не собирается
+    # в памяти целиком
+    response = StreamingHttpResponse(
+        lines, content_type='application/x-ndjson; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def profile_export(request, username):
+    # Все посты автора с комментариями в NDJSON
+    author = get_object_or_404(User, username=username)
+    return _ndjson_response(
+        export_posts(author_id=author.id), f'{author.username}.ndjson'
+    )
+
+
+@login_required
+def group_export(request, slug):
+    # Все посты группы с комментариями в NDJSON
+    group = get_object_or_404(Group, slug=slug)
+    return _ndjson_response(
+        export_posts(group_id=group.id), f'{group.slug}.ndjson'
+    )
+
+
+def search(request):
+    # Полнотекстовый поиск по индексу FTS5, по релевантности
+    form = SearchForm(request.GET or None)
+    context = {'form': form, 'page_obj': None}
+    if form.is_valid():
+        results = search_posts(
+            form.cleaned_data['q'],
+            Post.objects.select_related('author', 'group'),
+        )
+        if form.cleaned_data['group']:
+            results = results.filter(group=form.cleaned_data['group'])
+        if form.cleaned_data['author']:
+            results = results.filter(
+                author__username=form.cleaned_data['author']
+            )
+        paginator = CursorPaginator(
+            results, settings.NUM_OF_POSTS, ordering=SEARCH_ORDERING
+        )
+        page_obj = paginator.get_page(request.GET.get('cursor'))
+        # Ссылки паджинатора сохраняют параметры поиска
+        query = request.GET.copy()
+        query.pop('cursor', None)
+        context.update({
+            'page_obj': page_obj,
+            'page_query': query.urlencode() + '&',
+            'thumbnails': thumbnails.ThumbnailBatch(page_obj.object_list),
+        })
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
@@ -71,12 +288,15 @@ def post_create(request):
     # Создание поста
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=uploads.upload_files(request),
     )
     if form.is_valid():
         create_post = form.save(commit=False)
         create_post.author = request.user
-        create_post.save()
+        with transaction.atomic():
+            create_post.save()
+            UserCounter.objects.bump(request.user.id, posts_count=1)
+        thumbnails.schedule(create_post)
         return redirect('posts:profile', create_post.author)
     template = 'posts/create_post.html'
     context = {'form': form}
@@ -91,43 +311,97 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=uploads.upload_files(request),
         instance=edit_post
     )
     if form.is_valid():
-        form.save()
+        # Сохраняем только поля формы, чтобы не затереть счётчики
+        edit_post = form.save(commit=False)
+        if 'image' in form.changed_data:
+            # Варианты старой картинки к новой не подходят
+            edit_post.image_widths = ''
+        edit_post.save(update_fields=[*form.Meta.fields, 'image_widths'])
+        if 'image' in form.changed_data:
+            thumbnails.schedule(edit_post)
         return redirect('posts:post_detail', post_id)
     template = 'posts/create_post.html'
     context = {'form': form, 'is_edit': True}
     return render(request, template, context)
 
 
+def _comment_response(request, comment=None, form=None):
+    # Ответ скрипту вместо страницы поста: новый комментарий (201)
+    # или ошибки формы (400) — HTML-фрагментом или JSON по Accept
+    if comment is not None:
+        status = 201
+        html = render_to_string(
+            'includes/comment.html', {'comment': comment}, request
+        )
+        data = {'id': comment.id, 'html': html}
+    else:
+        status = 400
+        html = render_to_string(
+            'includes/comment_errors.html', {'form': form}, request
+        )
+        data = {'errors': form.errors.get_json_data(), 'html': html}
+    if 'application/json' in request.META.get('HTTP_ACCEPT', ''):
+        return JsonResponse(data, status=status)
+    return HttpResponse(html, status=status)
+
+
 @login_required
 def add_comment(request, post_id):
-    # Добавление комментария
-    post = get_object_or_404(Post, id=post_id)
+    # Добавление комментария; запросу из скрипта (X-Requested-With)
+    # отдаётся только фрагмент, без повторной отрисовки поста
+    partial = request.is_ajax()
+    posts = Post.objects.select_related('author__counters', 'group')
+    if partial:
+        posts = Post.objects.only('id')
+    post = get_object_or_404(posts, id=post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            Post.objects.filter(id=post.id).update(
+                comments_count=F('comments_count') + 1
+            )
+        if partial:
+            return _comment_response(request, comment=comment)
         return redirect('posts:post_detail', post_id=post_id)
-
-    context = {
-        'post': post,
-        'form': form,
-        'comments': comments,
-    }
-    return render(request, 'posts:post_detail', context)
+    if partial:
+        return _comment_response(request, form=form)
+    return _post_detail(request, post, form)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user)
-    context = addition_paginator(posts, request)
+    # Лента подписок читается из материализованной таблицы; старые
+    # ссылки ?page= — по индексу постов автора, author_id IN (...)
+    posts = Post.objects.none()
+    if request.GET.get('page') is not None:
+        posts = Post.objects.filter(
+            author_id__in=follow_graph.following_ids(request.user.id)
+        ).select_related('author', 'group')
+    # Порядок ключа задаётся сразу: Paginator предупреждает о
+    # неупорядоченной выборке ещё до того, как курсор её отсортирует
+    entries = TimelineEntry.objects.filter(
+        user=request.user
+    ).select_related('post__author', 'post__group').order_by(
+        *TIMELINE_ORDERING
+    )
+    context = addition_paginator(
+        posts, request, ('follow', request.user.id),
+        cursor_paginator=CursorPaginator(
+            entries,
+            settings.NUM_OF_POSTS,
+            ordering=TIMELINE_ORDERING,
+            unwrap=attrgetter('post'),
+        ),
+    )
+    context['suggestions'] = _suggestions(request.user)
     template = 'posts/follow.html'
     return render(request, template, context)
 
@@ -137,7 +411,13 @@ def profile_follow(request, username):
     # Подписка
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(
+                user=request.user, author=author
+            )
+            if created:
+                UserCounter.objects.bump(request.user.id, following_count=1)
+                UserCounter.objects.bump(author.id, followers_count=1)
     template = 'posts:profile'
     return redirect(template, author)
 
@@ -150,6 +430,11 @@ def profile_unfollow(request, username):
         user=request.user,
         author__username=username
     )
-    user_follower.delete()
+    with transaction.atomic():
+        user_follower.delete()
+        UserCounter.objects.bump(request.user.id, following_count=-1)
+        UserCounter.objects.bump(
+            user_follower.author_id, followers_count=-1
+        )
     template = 'posts:profile'
     return redirect(template, username)
@@ -0,0 +1,73 @@
+// Подгрузка следующей страницы комментариев на месте кнопки.
+// Без JS кнопка остаётся обычной ссылкой на страницу поста.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('[data-comments-more] a');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  var block = link.parentElement;
+  fetch(link.dataset.url, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      block.outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
+
+// Отправка комментария без перезагрузки: сервер возвращает только
+// отрисованный комментарий или ошибки формы.
+function showCommentResponse(form, errors, status, html) {
+  if (status === 400) {
+    errors.innerHTML = html;
+    return;
+  }
+  errors.innerHTML = '';
+  form.reset();
+  document.querySelector('[data-comments]')
+    .insertAdjacentHTML('afterbegin', html);
+  var count = document.querySelector('[data-comments-count]');
+  if (count) {
+    count.textContent = parseInt(count.textContent, 10) + 1;
+  }
+}
+
+document.addEventListener('submit', function (event) {
+  var form = event.target.closest('[data-comment-form]');
+  if (!form) {
+    return;
+  }
+  event.preventDefault();
+  var errors = document.querySelector('[data-comment-errors]');
+  fetch(form.action, {
+    method: 'POST',
+    body: new FormData(form),
+    credentials: 'same-origin',
+    headers: {'X-Requested-With': 'XMLHttpRequest'}
+  })
+    .then(function (response) {
+      if (response.status !== 201 && response.status !== 400) {
+        throw new Error(response.status);
+      }
+      // Ответ принят: обычная отправка формы после этого сохранила бы
+      // комментарий второй раз, поэтому ошибки вывода только в консоль
+      response.text()
+        .then(function (html) {
+          showCommentResponse(form, errors, response.status, html);
+        })
+        .catch(function (error) {
+          console.error(error);
+        });
+    })
+    .catch(function () {
+      // Сеть или неожиданный ответ: комментарий не принят
+      form.submit();
+    });
+});
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,7 +42,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -80,9 +81,16 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Общий для всех процессов воркеров кэш в файле SQLite:
+# сброс версии фрагмента в одном процессе виден остальным
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.TimedSQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 }
 
@@ -105,7 +113,77 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 NUM_OF_POSTS: int = 10  # Выборка по N-постов на странице
 NUMBER_OF_TEST_POSTS: int = 101  # Колличество тестовых постов
+NUM_OF_COMMENTS: int = 20  # Комментариев на странице поста
+NUM_OF_FOLLOWS: int = 50  # Подписчиков или подписок на странице
 
 BATCH_SIZE = 100
 
+# Сколько секунд хранится число постов ленты; для ленты подписок
+# это и есть предел устаревания после новых постов авторов
+COUNT_CACHE_TIMEOUT: int = 60 * 5
+
+# Фрагменты шаблонов сбрасываются по версиям (posts.cache_versions),
+# поэтому срок жизни может быть долгим
+FRAGMENT_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+# Миниатюры картинок постов: создаются фоном при загрузке
+# (posts.thumbnails), шаблоны только читают готовые
+POST_THUMBNAILS = {
+    'card': ('400x400', {'crop': 'center', 'upscale': True}),
+    'wide': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Загрузки пишутся во временный файл по частям (posts.uploads);
+# больше POST_IMAGE_MAX_UPLOAD_BYTES не принимается
+FILE_UPLOAD_HANDLERS = ['posts.uploads.BoundedUploadHandler']
+POST_IMAGE_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS: int = 50 * 10 ** 6
+
+# Хранимый оригинал: больше по стороне или весу — уменьшается
+# и перекодируется в JPEG
+POST_IMAGE_MAX_SIDE: int = 2048
+POST_IMAGE_MAX_BYTES: int = 1024 * 1024
+
+# Ширины вариантов картинки поста для srcset (posts.variants),
+# каждый в WebP и запасном JPEG
+POST_IMAGE_WIDTHS = (320, 640, 960, 1280)
+
+# Фоновые задачи (раскладка постов по лентам и т.п.): число потоков
+# и синхронный режим для тестов
+BACKGROUND_WORKERS: int = 2
+BACKGROUND_TASKS_EAGER: bool = False
+
+# Сколько последних постов автора попадает в ленту при подписке
+TIMELINE_BACKFILL: int = 100
+
+# Множества авторов, на которых подписан пользователь
+# (posts.follow_graph); сбрасываются при подписке и отписке
+FOLLOWING_CACHE_TIMEOUT: int = 60 * 60 * 24
+
+# Рекомендации авторов (compute_suggestions): сколько хранится на
+# пользователя и сколько показывается на страницах
+SUGGESTIONS_PER_USER: int = 10
+SUGGESTIONS_SHOWN: int = 5
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Замеры запросов (core.timing): заголовок Server-Timing, строка
+# в лог на каждый запрос (уровень INFO) и предупреждение с самыми
+# медленными SQL о запросах дольше SLOW_REQUEST_MS. Заголовок
+# раскрывает любому клиенту число и время запросов к БД, поэтому
+# по умолчанию он только в отладке
+SERVER_TIMING_HEADER: bool = DEBUG
+SLOW_REQUEST_MS: int = 500
+SLOW_REQUEST_QUERIES: int = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # INFO включит строку на каждый запрос
+        'core.timing': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}